@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+
+# Refresh benchmark suite, run entirely against the offline stand-in server
+# (benchmarks/stub_server.py), so it costs no API calls and is repeatable.
+#
+#   parse      solar XML parse, OneCall JSON decode + unit conversion, view-model build
+#   render     full re-render of every tab, and a refresh where nothing changed
+#   cold       window start plus weather and solar load with empty caches
+#   warm       the same with the caches left by a previous run
+#   refresh    load_weather_data() for weather and solar once the app is running
+#   sites-N    Sites tab load for N monitored locations (cold caches)
+#
+# Every GUI scenario runs in a fresh interpreter on the offscreen Qt platform, in a
+# scratch directory with its own wxconfig.ini pointing [Endpoints] at the stub.
+#
+#   python benchmarks/bench_refresh.py --runs 5 --latency 50 --save results/before.json
+#   python benchmarks/bench_refresh.py --runs 5 --latency 50 --compare results/before.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import stub_server  # noqa: E402
+
+SITE_COUNTS = (1, 5, 20)
+PARSE_LOOPS = 200
+RENDER_LOOPS = 50
+IDLE_TIMEOUT = 60
+
+
+#### Child process side ####
+
+def report(name, seconds):
+    print(f"result {json.dumps({'name': name, 'seconds': seconds})}", flush=True)
+
+
+# Function to run the event loop until no source is loading and no worker is busy
+def wait_idle(app, window):
+    deadline = time.perf_counter() + IDLE_TIMEOUT
+    quiet = 0
+    while quiet < 2:  # idle on two checks in a row, so queued results are delivered
+        app.processEvents()
+        busy = (window.scheduler.busy() or window.thread_pool.activeThreadCount()
+                or window.site_pool.activeThreadCount())
+        quiet = 0 if busy else quiet + 1
+        if time.perf_counter() > deadline:
+            raise TimeoutError("refresh did not finish")
+        time.sleep(0.001)
+
+
+def child(scenario):
+    sys.path.insert(0, REPO_DIR)
+    from PyQt6.QtWidgets import QApplication
+    import smwPyWx
+    import wxview
+    wxcore = smwPyWx.wxcore
+
+    app = QApplication(sys.argv[:1])
+    wxcore.load_settings()
+    wxcore.idle_prefetch_delay = 0  # keep background prefetches out of the timings
+
+    start = time.perf_counter()
+    window = smwPyWx.WeatherApp()
+    window.show()
+    if scenario.startswith('sites-'):
+        wait_idle(app, window)
+        start = time.perf_counter()
+        window.tabs.setCurrentWidget(window.sites_tab)
+        wait_idle(app, window)
+        report(scenario, time.perf_counter() - start)
+        return
+
+    window.load_weather_data(["solar"])
+    wait_idle(app, window)
+    if scenario in ('cold', 'warm'):
+        report(scenario, time.perf_counter() - start)
+        return
+
+    if scenario == 'refresh':
+        wxcore.onecall_cache.ttl = 0  # always go back to the (stub) API
+        start = time.perf_counter()
+        window.load_weather_data(["weather", "solar"])
+        wait_idle(app, window)
+        report('refresh', time.perf_counter() - start)
+    elif scenario == 'render':
+        for index in range(window.tabs.count()):
+            window.tabs.setCurrentIndex(index)
+        window.tabs.setCurrentIndex(0)
+        app.processEvents()
+        start = time.perf_counter()
+        for _ in range(RENDER_LOOPS):
+            window.view_state = wxview.ViewState()  # forget what is on screen
+            window.render_all()
+            app.processEvents()
+        report('render-full', (time.perf_counter() - start) / RENDER_LOOPS)
+        start = time.perf_counter()
+        for _ in range(RENDER_LOOPS):
+            window.render_all()
+            app.processEvents()
+        report('render-unchanged', (time.perf_counter() - start) / RENDER_LOOPS)
+
+
+#### Parent side ####
+
+def parse_benchmarks():
+    import wxalerts
+    import wxsolar
+    import wxunits
+    import wxview
+    solar_xml = stub_server.load_fixture('solarxml.xml')
+    onecall_json = stub_server.load_fixture('onecall.json')
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(PARSE_LOOPS):
+        solar = wxsolar.parse(solar_xml)
+    results['parse-solar'] = (time.perf_counter() - start) / PARSE_LOOPS
+
+    start = time.perf_counter()
+    for _ in range(PARSE_LOOPS):
+        display = wxunits.convert_onecall(json.loads(onecall_json), 'imperial')
+    results['parse-onecall'] = (time.perf_counter() - start) / PARSE_LOOPS
+
+    start = time.perf_counter()
+    for _ in range(PARSE_LOOPS):
+        wxview.current_view(display['current'], 'imperial')
+        wxview.forecast_view(display['daily'], 'imperial')
+        wxalerts.parse(display.get('alerts', []))
+        wxview.solar_view(solar)
+    results['viewmodel'] = (time.perf_counter() - start) / PARSE_LOOPS
+    return results
+
+
+# Function to write a scratch wxconfig.ini pointing every endpoint at the stub
+def write_config(directory, base_url, site_count=0):
+    lines = ["[Settings]", "zip_code = 10001", "units = imperial", "api_key = bench", "",
+             "[Endpoints]", f"base_url = {base_url}", "",
+             "[Network]", "retries = 0", "api_calls_per_minute = 100000", ""]
+    if site_count:
+        lines += ["[Locations]"] + [f"Site {i} = {10001 + i * 997:05d}" for i in range(site_count)] + [""]
+    with open(os.path.join(directory, 'wxconfig.ini'), 'w') as f:
+        f.write("\n".join(lines))
+
+
+def run_child(scenario, directory):
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', scenario], cwd=directory,
+                               env=env, capture_output=True, text=True, timeout=IDLE_TIMEOUT * 2)
+    results = {}
+    for line in completed.stdout.splitlines():
+        if line.startswith('result '):
+            result = json.loads(line[len('result '):])
+            results[result['name']] = result['seconds']
+    if not results:
+        print(f"{scenario}: no result\n{completed.stderr.strip()}", file=sys.stderr)
+    return results
+
+
+def gui_benchmarks(base_url, runs):
+    samples = {}
+
+    def add(results):
+        for name, seconds in results.items():
+            samples.setdefault(name, []).append(seconds)
+
+    for _ in range(runs):
+        directory = tempfile.mkdtemp(prefix='smwpywx-bench-')
+        try:
+            write_config(directory, base_url)
+            add(run_child('cold', directory))
+            add(run_child('warm', directory))
+            add(run_child('refresh', directory))
+            add(run_child('render', directory))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        for count in SITE_COUNTS:
+            directory = tempfile.mkdtemp(prefix='smwpywx-bench-')
+            try:
+                write_config(directory, base_url, count)
+                add(run_child(f'sites-{count}', directory))
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+    return samples
+
+
+def summarize(samples):
+    return {name: {'median': statistics.median(values), 'min': min(values), 'max': max(values), 'runs': len(values)}
+            for name, values in samples.items()}
+
+
+def git_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"{'benchmark':<20}{'median':>12}{'min':>12}{'max':>12}" + (f"{'vs baseline':>14}" if baseline else ""))
+    for name, stats in results.items():
+        line = f"{name:<20}" + "".join(f"{stats[key] * 1000:>10.3f}ms" for key in ('median', 'min', 'max'))
+        old = (baseline or {}).get(name)
+        if old:
+            line += f"{(stats['median'] / old['median'] - 1) * 100:>+13.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark smwPyWx refreshes against the offline stub server.")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=50, help="stub latency per request in milliseconds")
+    parser.add_argument('--scale', type=int, default=1, help="OneCall payload size multiplier")
+    parser.add_argument('--only', choices=('parse', 'gui'), help="run just one group")
+    parser.add_argument('--save', metavar='PATH', help="write the results as JSON for later comparison")
+    parser.add_argument('--compare', metavar='PATH', help="show the change against saved results")
+    args = parser.parse_args()
+
+    config = stub_server.StubConfig(latency=args.latency / 1000, scale=args.scale)
+    server, base_url = stub_server.start(config)
+    try:
+        samples = {}
+        if args.only != 'gui':
+            for _ in range(args.runs):
+                for name, seconds in parse_benchmarks().items():
+                    samples.setdefault(name, []).append(seconds)
+        if args.only != 'parse':
+            samples.update(gui_benchmarks(base_url, args.runs))
+    finally:
+        server.shutdown()
+
+    results = summarize(samples)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+    print(f"stub requests: {config.hits}")
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'version': git_version(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'stub': {'latency_ms': args.latency, 'scale': args.scale},
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2])
+    else:
+        sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+# Startup benchmark: time from launching the app to the first paint of the main window.
+# Each run is a fresh interpreter (so module imports are included) on the offscreen Qt
+# platform. Run it from the directory holding wxconfig.ini and wxcache/ to measure a
+# warm start from the saved snapshot; from an empty directory for a cold start.
+#
+#   python benchmarks/bench_startup.py --runs 10
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Runs inside the child process: build the window and report when it first paints
+def child():
+    start = time.perf_counter()
+    sys.path.insert(0, REPO_DIR)
+    import smwPyWx
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QObject, QEvent
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint:
+                print(f"first_paint {time.perf_counter() - start:.6f}", flush=True)
+                os._exit(0)  # Don't wait for the background refresh
+            return False
+
+    app = QApplication(sys.argv[:1])
+    smwPyWx.wxcore.load_settings()  # Never prompt; defaults are fine without a config
+    window = smwPyWx.WeatherApp()
+    paint_filter = FirstPaint()
+    window.installEventFilter(paint_filter)
+    window.show()
+    app.exec()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first paint of smwPyWx.")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    wall_times, paint_times = [], []
+    for _ in range(args.runs):
+        launched = time.perf_counter()
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], env=env,
+                                capture_output=True, text=True, timeout=60).stdout
+        wall = time.perf_counter() - launched
+        for line in output.splitlines():
+            if line.startswith('first_paint '):
+                paint_times.append(float(line.split()[1]))
+                wall_times.append(wall)
+
+    if not paint_times:
+        print("The window never painted; check that the app starts.")
+        return 1
+    print(f"runs: {len(paint_times)}")
+    print(f"import + build + first paint: median {statistics.median(paint_times) * 1000:.0f} ms, "
+          f"max {max(paint_times) * 1000:.0f} ms")
+    print(f"including interpreter start:  median {statistics.median(wall_times) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--child']:
+        child()
+    else:
+        sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+# Offline stand-in for the OpenWeather and HamQSL endpoints, for benchmarks and for
+# running the app without spending API calls. Serves the recorded payloads in
+# benchmarks/fixtures on the same paths as the real APIs, with optional latency,
+# errors and larger payloads. Point the app at it with
+#
+#   [Endpoints]
+#   base_url = http://127.0.0.1:8765
+#
+#   python benchmarks/stub_server.py --port 8765 --latency 80 --error-rate 0.05
+#
+# Fixture timestamps are shifted to the current time, OneCall honours `exclude`, and
+# each ZIP geocodes to its own coordinates so multi-site runs spread over grid cells.
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# OneCall fields holding UNIX times, moved forward so fixtures always look fresh
+TIME_FIELDS = ('dt', 'sunrise', 'sunset', 'moonrise', 'moonset', 'start', 'end')
+SHIFT_STEP = 10 * 60
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+# Function to build a small solid-colour PNG without any imaging library
+def make_png(size=50, rgb=(70, 130, 180)):
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    row = b'\x00' + bytes(rgb) * size
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(row * size)) + chunk(b'IEND', b''))
+
+
+def shift_times(value, offset):
+    if isinstance(value, dict):
+        return {key: (item + offset if key in TIME_FIELDS and isinstance(item, int) else shift_times(item, offset))
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [shift_times(item, offset) for item in value]
+    return value
+
+
+class StubConfig:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, scale=1, etag=True, seed=None):
+        self.latency = latency          # seconds added to every response
+        self.jitter = jitter            # up to this many extra seconds, uniformly
+        self.error_rate = error_rate    # fraction of requests answered with error_status
+        self.error_status = error_status
+        self.scale = scale              # OneCall hourly/minutely/daily arrays repeated this many times
+        self.etag = etag                # send ETags and answer If-None-Match with 304
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.hits = {}                  # endpoint -> requests served
+
+        self.geo = json.loads(load_fixture('geo_zip.json'))
+        self.onecall = json.loads(load_fixture('onecall.json'))
+        self.solar = load_fixture('solarxml.xml')
+        self.icon = make_png()
+
+    def count(self, endpoint):
+        with self.lock:
+            self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+
+    def roll_error(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def delay(self):
+        with self.lock:
+            extra = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + extra
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, as the real APIs allow
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        config = self.server.config
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/geo/1.0/zip':
+            endpoint, body, content_type = 'geo', self.geo_body(query), 'application/json'
+        elif url.path == '/data/3.0/onecall':
+            endpoint, body, content_type = 'onecall', self.onecall_body(query), 'application/json'
+        elif url.path == '/solarxml.php':
+            endpoint, body, content_type = 'solar', config.solar, 'text/xml'
+        elif url.path.startswith('/img/wn/') and url.path.endswith('.png'):
+            endpoint, body, content_type = 'icon', config.icon, 'image/png'
+        else:
+            self.reply(404, b'not found', 'text/plain')
+            return
+
+        config.count(endpoint)
+        delay = config.delay()
+        if delay:
+            time.sleep(delay)
+        if config.roll_error():
+            self.reply(config.error_status, b'{"cod": %d}' % config.error_status, 'application/json')
+            return
+
+        headers = {}
+        if config.etag and endpoint in ('solar', 'icon'):
+            etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                self.reply(304, b'', None, headers)
+                return
+        self.reply(200, body, content_type, headers)
+
+    def geo_body(self, query):
+        zip_code = query.get('zip', '10001').split(',')[0]
+        # Spread ZIPs over roughly a 10 x 10 degree area around the fixture location
+        digest = hashlib.sha1(zip_code.encode()).digest()
+        geo = dict(self.server.config.geo, zip=zip_code)
+        geo['lat'] = round(geo['lat'] + digest[0] / 25.5 - 5, 4)
+        geo['lon'] = round(geo['lon'] + digest[1] / 25.5 - 5, 4)
+        return json.dumps(geo).encode()
+
+    def onecall_body(self, query):
+        config = self.server.config
+        # Shift in whole 10-minute steps, as OneCall updates; alert start times then stay put between polls
+        offset = (int(time.time()) - config.onecall['current']['dt']) // SHIFT_STEP * SHIFT_STEP
+        payload = shift_times(config.onecall, offset)
+        for block in ('hourly', 'minutely', 'daily'):
+            payload[block] = payload[block] * config.scale
+        for block in query.get('exclude', '').split(','):
+            payload.pop(block.strip(), None)
+        payload['lat'] = float(query.get('lat', payload['lat']))
+        payload['lon'] = float(query.get('lon', payload['lon']))
+        return json.dumps(payload).encode()
+
+    def reply(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Function to start the stub on a background thread; returns (server, base_url).
+# Port 0 picks a free port. Call server.shutdown() to stop it.
+def start(config=None, host='127.0.0.1', port=0):
+    server = ThreadingHTTPServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.config = config or StubConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded OpenWeather/HamQSL fixtures locally.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0, help="milliseconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0, help="up to this many extra milliseconds")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of requests that fail (0-1)")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--scale', type=int, default=1, help="repeat OneCall hourly/minutely/daily arrays N times")
+    parser.add_argument('--no-etag', action='store_true', help="never answer 304 Not Modified")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency / 1000, args.jitter / 1000, args.error_rate, args.error_status,
+                        args.scale, not args.no_etag)
+    server, base_url = start(config, args.host, args.port)
+    print(f"Serving fixtures at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Requests served: {config.hits}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,105 +3,280 @@
 # Created by Chengmania on Sunday afternoon on 2024
 
 import sys
-import os
-import requests
-import configparser
 import time  # For converting UNIX timestamp
-import xml.etree.ElementTree as ET  # For parsing solar weather XML data
+import wxcore  # Settings, caches and all fetching; no Qt
+
+# The headless CLI and the broker must not import Qt at all, so dispatch to them before the PyQt6 imports
+if __name__ == '__main__' and '--headless' in sys.argv[1:]:
+    import wxheadless
+    sys.exit(wxheadless.main([arg for arg in sys.argv[1:] if arg != '--headless']))
+if __name__ == '__main__' and '--broker' in sys.argv[1:]:
+    import wxbroker
+    sys.exit(wxbroker.main([arg for arg in sys.argv[1:] if arg != '--broker']))
+
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, 
                              QTabWidget, QDialog, QFormLayout, QLineEdit, QComboBox, 
-                             QPushButton, QMessageBox, QHBoxLayout)
-from PyQt6.QtGui import QPixmap, QAction, QFont
-from PyQt6.QtCore import Qt
-import pgeocode  # For retrieving state information
-
-# Base API URLs
-BASEGEOURL = "http://api.openweathermap.org/geo/1.0/zip?"
-BASEOPENWEATHER = "https://api.openweathermap.org/data/3.0/onecall?"
-ICON_URL = "http://openweathermap.org/img/wn/"
-SOLAR_DATA_URL = "https://www.hamqsl.com/solarxml.php"
-
-# Configuration file path
-CONFIG_FILE = 'wxconfig.ini'
-
-# Default Settings
-default_zip_code = "10001"
-default_units = "metric"  # Default to Celsius ("metric" for Celsius, "imperial" for Fahrenheit)
-default_api_key = ''
-
-# Initialize variables to hold settings
-zip_code = default_zip_code
-units = default_units
-API_KEY = default_api_key
-
-# Function to load settings from wxconfig.ini
+                             QPushButton, QMessageBox, QHBoxLayout, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView, QTableView,
+                             QStyledItemDelegate, QScrollArea, QSystemTrayIcon, QStyle)
+from PyQt6.QtGui import QPixmap, QImage, QAction, QFont, QPainter, QPen, QColor, QIcon
+from PyQt6.QtCore import (Qt, QObject, QRunnable, QThreadPool, QTimer, QEvent, QSize, pyqtSignal,
+                          QAbstractTableModel, QModelIndex)
+import wxicons  # Two-tier weather icon cache
+import wxunits  # Local metric -> display unit conversion
+import wxschedule  # Per-source auto-refresh scheduling
+import wxsites  # Multi-location monitoring
+import wxview  # View-models and diff-based widget updates
+import wxmetrics  # Timing spans and counters for Help -> Diagnostics
+import wxtimeline  # Hourly and minutely forecast series
+import wxalerts  # Weather alert identity, diffing and notifications
+
+# Number of background fetch threads (icons are downloaded in parallel)
+MAX_FETCH_THREADS = 8
+
+# Data sources refreshed independently by the auto-refresh scheduler
+REFRESH_SOURCES = ("weather", "solar")
+
+# Sources refreshed whichever tab is showing: weather feeds the location and status bar,
+# alerts-only polls (when enabled) raise notifications. Only alerts are polled while minimized.
+ALWAYS_ACTIVE_SOURCES = ("weather", "alerts")
+MINIMIZED_SOURCES = ("alerts",)
+
+# How long a desktop alert notification stays up, in milliseconds
+ALERT_MESSAGE_MS = 15000
+
+# Longest single wait of the refresh timer; it re-checks after this (e.g. after a suspend)
+MAX_TIMER_DELAY = 15 * 60
+
+# Columns of the Sites overview tab
+SITE_COLUMNS = ["Site", "Zip", "Location", "Temp", "Weather", "Wind", "Alerts", "Updated"]
+
+# Row height and icon size of the Hourly and Next Hour tables
+TIMELINE_ROW_HEIGHT = 28
+TIMELINE_ICON_SIZE = 25
+
+# Series and time windows offered on the Trends tab
+TREND_SERIES = [("K Index", "kindex"), ("Solar Flux", "solarflux"), ("Temperature", "temp"), ("Pressure (hPa)", "pressure")]
+TREND_WINDOWS = [("24 Hours", 86400), ("7 Days", 7 * 86400), ("30 Days", 30 * 86400), ("1 Year", 365 * 86400)]
+
+# Function to describe how old data is, e.g. "just now", "12 min ago", "3 h ago"
+def format_age(age):
+    if age < 60:
+        return "just now"
+    if age < 3600:
+        return f"{int(age // 60)} min ago"
+    return f"{int(age // 3600)} h ago"
+
+# Function to load settings, asking for them if wxconfig.ini doesn't exist yet
 def load_settings():
-    global zip_code, units, API_KEY
-    config = configparser.ConfigParser()
-
-    if os.path.exists(CONFIG_FILE):
-        config.read(CONFIG_FILE)
-        if 'Settings' in config:
-            zip_code = config['Settings'].get('zip_code', default_zip_code)
-            units = config['Settings'].get('units', default_units)
-            API_KEY = config['Settings'].get('api_key', default_api_key)
-    else:
+    if not wxcore.load_settings():
         prompt_for_initial_settings()
 
 # Function to prompt user for settings if config file doesn't exist
 def prompt_for_initial_settings():
     settings_dialog = SettingsDialog()
     if settings_dialog.exec() == QDialog.DialogCode.Accepted:
-        save_settings()
-
-# Function to save settings to wxconfig.ini
-def save_settings():
-    config = configparser.ConfigParser()
-    config['Settings'] = {
-        'zip_code': zip_code,
-        'units': units,
-        'api_key': API_KEY
-    }
-
-    with open(CONFIG_FILE, 'w') as configfile:
-        config.write(configfile)
-
-# Function to geocode location using zip code
-def geocode_location(zip_code):
-    url = f"{BASEGEOURL}zip={zip_code},US&appid={API_KEY}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        QMessageBox.warning(None, "Error", "Failed to get geocode data.")
-        return None
+        wxcore.save_settings()
+
+# Function to load a weather icon from the disk cache or the network; decoded off the GUI thread into a QImage
+def get_weather_icon(icon):
+    image = QImage()
+    image.loadFromData(wxcore.get_icon_data(icon))
+    return icon, image
+
+#### Trend chart ####
+# Draws downsampled history: a vertical min-max bar per bucket joined by a midline
+class TrendChart(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.points = []  # [(bucket start, min, max)]
+        self.start = 0
+        self.end = 1
+        self.setMinimumHeight(200)
+
+    def set_points(self, points, start, end):
+        self.points = points
+        self.start = start
+        self.end = end
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor("white"))
+        left, top, right, bottom = 60, 10, self.width() - 10, self.height() - 25
+        if not self.points:
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "No history recorded for this window yet.")
+            return
+
+        low = min(p[1] for p in self.points)
+        high = max(p[2] for p in self.points)
+        if high == low:
+            low, high = low - 1, high + 1
+        span = self.end - self.start
+
+        def x_pos(ts):
+            return int(left + (ts - self.start) / span * (right - left))
+
+        def y_pos(value):
+            return int(bottom - (value - low) / (high - low) * (bottom - top))
+
+        painter.setPen(QPen(QColor("gray")))
+        painter.drawRect(left, top, right - left, bottom - top)
+        painter.drawText(5, top + 10, f"{high:.4g}")
+        painter.drawText(5, bottom, f"{low:.4g}")
+        painter.drawText(left, self.height() - 5, time.strftime('%Y-%m-%d %H:%M', time.localtime(self.start)))
+        end_text = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.end))
+        painter.drawText(right - painter.fontMetrics().horizontalAdvance(end_text), self.height() - 5, end_text)
+
+        painter.setPen(QPen(QColor("blue"), 1))
+        previous = None
+        for ts, minimum, maximum in self.points:
+            x = x_pos(ts)
+            painter.drawLine(x, y_pos(minimum), x, y_pos(maximum))
+            mid = y_pos((minimum + maximum) / 2)
+            if previous is not None:
+                painter.drawLine(previous[0], previous[1], x, mid)
+            previous = (x, mid)
+
+#### Hourly and minutely tables ####
+# Table model over a wxtimeline series. QTableView only asks for the cells it is
+# showing, so a cell is formatted when it scrolls into view, not when data arrives.
+class TimelineModel(QAbstractTableModel):
+    def __init__(self, columns):
+        super().__init__()
+        self.columns = columns
+        self.series = None
+        self.units = None
+
+    # Show a new series. An unchanged refresh touches nothing; one with the same number of
+    # rows only repaints the visible cells.
+    def set_series(self, series, units):
+        if units == self.units and self.series is not None and wxtimeline.same_series(series, self.series):
+            return
+        self.units = units
+        if self.series is not None and len(series) == len(self.series):
+            self.series = series
+            if len(series):
+                self.dataChanged.emit(self.index(0, 0), self.index(len(series) - 1, len(self.columns) - 1))
+        else:
+            self.beginResetModel()
+            self.series = series
+            self.endResetModel()
 
-# Function to get weather data using OpenWeather API 3.0
-def get_weather(lat, lon):
-    url = f"{BASEOPENWEATHER}lat={lat}&lon={lon}&units={units}&exclude=minutely,hourly&appid={API_KEY}"
-    response = requests.get(url)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        QMessageBox.warning(None, "Error", "Failed to get weather data.")
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.series is None else len(self.series)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section]
         return None
 
-# Function to fetch solar weather data
-def get_solar_weather():
-    response = requests.get(SOLAR_DATA_URL)
-    if response.status_code == 200:
-        return response.content  # Return XML data
-    else:
-        QMessageBox.warning(None, "Error", "Failed to get solar weather data.")
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cell_text(index.row(), index.column())
         return None
 
-# Function to fetch state from pgeocode library
-def get_state_from_zip(zip_code):
-    nomi = pgeocode.Nominatim('US')
-    location = nomi.query_postal_code(zip_code)
-    if location is not None and not location.isnull().all():
-        return location.state_code, location.state_name
-    return None, None
+class HourlyModel(TimelineModel):
+    ICON_COLUMN = 1
+
+    def __init__(self, icon_pixmaps):
+        super().__init__(wxtimeline.HOURLY_COLUMNS)
+        self.icon_pixmaps = icon_pixmaps  # the window's decoded icon cache, shared with the other tabs
+        self.icons = {}                   # icon code -> QIcon, scaled by the view to its icon size
+
+    def cell_text(self, row, column):
+        return wxtimeline.hourly_text(self.series, row, column, self.units)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DecorationRole and index.column() == self.ICON_COLUMN:
+            return self.icon(self.series.icon[index.row()])
+        return super().data(index, role)
+
+    def icon(self, code):
+        icon = self.icons.get(code)
+        if icon is None:
+            pixmap = self.icon_pixmaps.get(code)
+            if pixmap is None:
+                return None  # still loading; icon_loaded() repaints the column
+            icon = self.icons[code] = QIcon(pixmap)
+        return icon
+
+    def icon_loaded(self, code):
+        if code in self.icons:
+            return  # already drawn from the cache
+        if self.series is not None and code in self.series.icon:
+            self.dataChanged.emit(self.index(0, self.ICON_COLUMN), self.index(len(self.series) - 1, self.ICON_COLUMN),
+                                  [Qt.ItemDataRole.DecorationRole])
+
+class MinutelyModel(TimelineModel):
+    def __init__(self):
+        super().__init__(wxtimeline.MINUTELY_COLUMNS)
+
+    def cell_text(self, row, column):
+        return wxtimeline.minutely_text(self.series, row, column)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.UserRole:
+            return wxtimeline.precipitation_fraction(self.series, index.row())
+        return super().data(index, role)
+
+# Draws a minute's precipitation as a bar behind its text
+class PrecipitationDelegate(QStyledItemDelegate):
+    def paint(self, painter, option, index):
+        fraction = index.data(Qt.ItemDataRole.UserRole)
+        if fraction:
+            bar = option.rect.adjusted(2, 4, -2, -4)
+            bar.setWidth(max(1, int(bar.width() * fraction)))
+            painter.fillRect(bar, QColor(100, 149, 237, 110))
+        super().paint(painter, option, index)
+
+#### Background fetching ####
+# Signals must live on a QObject; QRunnable is not one
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object, str, object)  # job, kind, result
+    failed = pyqtSignal(object, str, str)       # job, kind, error message
+
+# Runs one fetch function on the thread pool and reports back through signals
+class FetchWorker(QRunnable):
+    def __init__(self, job, kind, fn, *args):
+        super().__init__()
+        self.job = job
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self):
+        # Skip work queued for a refresh that has since been superseded
+        if self.job.cancelled:
+            return
+        # capture() never raises; an exception escaping run() would abort the app
+        with wxmetrics.span(f"fetch.{self.kind}"):
+            result = wxcore.capture(self.fn, *self.args, what=f"{self.kind} data")
+        if self.job.cancelled:
+            return
+        if result.ok:
+            self.signals.finished.emit(self.job, self.kind, result.value)
+        else:
+            self.signals.failed.emit(self.job, self.kind, result.error)
+
+# One refresh of a data source ("weather" or "solar"); cancelled when a newer refresh of it starts.
+# Errors from interactive refreshes are shown in a message box, scheduled ones only in the status bar.
+class RefreshJob:
+    def __init__(self, source=None, interactive=False):
+        self.source = source
+        self.interactive = interactive
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.icon_targets = {}  # icon code -> labels showing that icon
+        self.pending = 0        # site fetches still outstanding
+        self.errors = []        # messages from site fetches that failed
+
+    def cancel(self):
+        self.cancelled = True
 
 # Main Window with tabs for current weather and 5-day forecast
 class WeatherApp(QMainWindow):
@@ -120,42 +295,107 @@ class WeatherApp(QMainWindow):
         # Create layout and add tab widget
         self.layout = QVBoxLayout(self.main_widget)
 
+        # Widgets that show view-model text, keyed like the wxview dicts; only changed keys are updated
+        self.view_widgets = {}
+        self.view_state = wxview.ViewState()
+
         # Location label above the tabs
         self.location_label = QLabel("Weather Information for --, --")
         self.layout.addWidget(self.location_label)
+        self.view_widgets['location'] = self.location_label
 
         # Create tab widget
         self.tabs = QTabWidget()
         self.layout.addWidget(self.tabs)
 
-        # Add current weather tab
-        self.current_weather_tab = QWidget()
-        self.current_weather_tab.setStyleSheet("background-color: white;")
-        self.tabs.addTab(self.current_weather_tab, "Current Weather")
-        self.create_current_weather_tab()
-
-        # Add 5-day forecast tab
-        self.forecast_tab = QWidget()
-        self.forecast_tab.setStyleSheet("background-color: white;")
-        self.tabs.addTab(self.forecast_tab, "5-Day Forecast")
-        self.create_forecast_tab()
-
-        # Add weather alerts tab
-        self.alerts_tab = QWidget()
-        self.alerts_tab.setStyleSheet("background-color: white;")
-        self.tabs.addTab(self.alerts_tab, "Weather Alerts")
-        self.create_alerts_tab()
-
-        # Add solar weather tab
-        self.solar_weather_tab = QWidget()
-        self.solar_weather_tab.setStyleSheet("background-color: white;")
-        self.tabs.addTab(self.solar_weather_tab, "Solar Weather")
-        self.create_solar_weather_tab()
+        # Tabs are empty placeholders until first shown; each lists the data sources it displays.
+        # Only the visible tab's sources (and always weather, for the location and status bar)
+        # are auto-refreshed; the rest are fetched when their tab opens or the app is idle.
+        self.tab_builders = {}  # tab -> function that builds its widgets, until first shown
+        self.tab_sources = {}   # tab -> data sources shown on it
+        self.current_weather_tab = self.add_tab("Current Weather", self.create_current_weather_tab, ("weather",))
+        self.forecast_tab = self.add_tab("5-Day Forecast", self.create_forecast_tab, ("weather",))
+        # Hourly and minutely views; each can be turned off in [Forecast], which also stops fetching its data
+        self.hourly_tab = self.minutely_tab = None
+        self.hourly_model = self.minutely_model = None
+        if wxcore.show_hourly:
+            self.hourly_tab = self.add_tab("Hourly", self.create_hourly_tab, ("weather",))
+        if wxcore.show_minutely:
+            self.minutely_tab = self.add_tab("Next Hour", self.create_minutely_tab, ("weather",))
+        self.alerts_tab = self.add_tab("Weather Alerts", self.create_alerts_tab, ("weather",))
+        self.solar_weather_tab = self.add_tab("Solar Weather", self.create_solar_weather_tab, ("solar",))
+        # History of solar indices and weather; read from the local database, nothing to fetch
+        self.trends_tab = self.add_tab("Trends", self.create_trends_tab, ())
+
+        # Add sites overview tab when extra locations are configured
+        self.sites_tab = None
+        if wxcore.sites:
+            self.sites_tab = self.add_tab("Sites", self.create_sites_tab, ("sites", "solar"))
 
         # Create the menu bar
         self.create_menu_bar()
 
-        # Load initial weather data
+        # Thread pool for background fetches; one refresh per source is live at a time
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(MAX_FETCH_THREADS)
+        self.refresh_jobs = {}  # source -> live RefreshJob
+
+        # Separate, smaller pool so many sites can't starve the main refresh
+        self.site_pool = QThreadPool()
+        self.site_pool.setMaxThreadCount(wxcore.site_max_workers)
+        self.site_list = []     # resolved wxsites.Site objects, one per Sites table row
+        self.site_cells = {}    # grid cell -> Sites table rows sharing its OneCall data
+        self.site_weather = {}  # grid cell -> (raw OneCall payload, fetch time)
+
+        # Auto-refresh: one single-shot timer re-armed for whichever source is due next
+        self.scheduler = wxschedule.RefreshScheduler(REFRESH_SOURCES + (("sites",) if wxcore.sites else ())
+                                                     + (("alerts",) if wxcore.alert_poll_interval > 0 else ()))
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.on_refresh_timer)
+
+        # Idle prefetch: once nothing has been in flight for a while, fetch hidden tabs' data
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.on_idle_timer)
+
+        # Resolved main location; its coordinates key the weather history
+        self.location = None
+
+        # Last raw (metric) OneCall payload, kept so a unit change can re-render locally
+        self.weather_data = None
+        self.weather_age = 0
+
+        # Hourly and minutely forecasts parsed from it (wxtimeline series)
+        self.hourly = None
+        self.minutely = None
+
+        # Current alerts keyed by identity (wxalerts.parse), or None until the first weather data
+        self.alerts = None
+        self.alert_labels = None  # alert key -> QLabel on the Weather Alerts tab, once it is built
+        self.tray = None          # QSystemTrayIcon, created for the first notification
+
+        # Last parsed HamQSL data (wxsolar.SolarData)
+        self.solar = None
+
+        # Decoded icons keyed by icon code, so a refresh never decodes the same PNG twice
+        self.icon_pixmaps = wxicons.LRUCache()
+        if wxcore.icon_prefetch:
+            self.start_fetch(RefreshJob(), "prefetch", wxcore.prefetch_weather_icons)
+
+        # Optional Prometheus-style metrics endpoint on localhost
+        if wxcore.metrics_port:
+            try:
+                wxmetrics.serve(wxcore.metrics_port)
+            except OSError as e:
+                print(f"Error: cannot serve metrics on port {wxcore.metrics_port}: {e}")
+
+        # Build only the tab that is showing
+        self.activate_tab(self.tabs.currentWidget())
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+
+        # Paint the last good data straight away, then refresh in the background
+        self.restore_snapshot()
         self.load_weather_data()
 
         #### Done Creating Tabs ####
@@ -176,7 +416,30 @@ class WeatherApp(QMainWindow):
         about_action.triggered.connect(self.open_about_dialog)
         about_menu.addAction(about_action)
 
+        # Create "Help" menu
+        help_menu = menu_bar.addMenu("Help")
+        diagnostics_action = QAction("Diagnostics", self)
+        diagnostics_action.triggered.connect(self.open_diagnostics_dialog)
+        help_menu.addAction(diagnostics_action)
+
     #### Layout the Tabs ####
+    def add_tab(self, title, builder, sources):
+        tab = QWidget()
+        tab.setStyleSheet("background-color: white;")
+        self.tabs.addTab(tab, title)
+        self.tab_builders[tab] = builder
+        self.tab_sources[tab] = sources
+        return tab
+
+    # Build a tab the first time it is shown, fill it from data already loaded,
+    # and make its data sources the ones the scheduler refreshes
+    def activate_tab(self, tab):
+        builder = self.tab_builders.pop(tab, None)
+        if builder is not None:
+            builder()
+            self.render_all()
+        self.scheduler.set_active(ALWAYS_ACTIVE_SOURCES + self.tab_sources.get(tab, ()))
+
     # Tab for current weather
     def create_current_weather_tab(self):
         main_layout = QVBoxLayout()
@@ -220,6 +483,22 @@ class WeatherApp(QMainWindow):
         main_layout.addLayout(columns_layout)
         self.current_weather_tab.setLayout(main_layout)
 
+        self.view_widgets.update({
+            'icon.current': self.weather_icon_label,
+            'current.temp': self.tempa_label,
+            'current.feels_like': self.feels_like_label,
+            'current.humidity': self.humidity_label,
+            'current.dew_point': self.dew_point_label,
+            'current.pressure': self.pressure_label,
+            'current.wind_speed': self.wind_speed_label,
+            'current.wind_gust': self.wind_gust_label,
+            'current.description': self.weather_desc_label,
+            'current.clouds': self.clouds_label,
+            'current.visibility': self.visibility_label,
+            'current.sunrise': self.sunrise_label,
+            'current.sunset': self.sunset_label,
+        })
+
     # Tab for 5-day forecast
     def create_forecast_tab(self):
         layout = QHBoxLayout()
@@ -245,14 +524,55 @@ class WeatherApp(QMainWindow):
             column.addWidget(self.precip_label, alignment=Qt.AlignmentFlag.AlignCenter)
             layout.addLayout(column)
             self.forecast_columns.append((self.day_label, self.day_icon_label, self.temp_label, self.precip_label))
+            self.view_widgets.update({f'forecast.{i}.day': self.day_label, f'icon.forecast.{i}': self.day_icon_label,
+                                      f'forecast.{i}.temp': self.temp_label, f'forecast.{i}.precip': self.precip_label})
 
         self.forecast_tab.setLayout(layout)
 
-    # Tab for weather alerts
+    # Tab for the 48-hour forecast
+    def create_hourly_tab(self):
+        layout = QVBoxLayout()
+        self.hourly_model = HourlyModel(self.icon_pixmaps)
+        layout.addWidget(self.create_timeline_view(self.hourly_model))
+        self.hourly_tab.setLayout(layout)
+
+    # Tab for the minute-by-minute precipitation forecast of the next hour
+    def create_minutely_tab(self):
+        layout = QVBoxLayout()
+        self.minutely_summary_label = QLabel("Precipitation: --")
+        layout.addWidget(self.minutely_summary_label)
+        self.view_widgets['minutely.summary'] = self.minutely_summary_label
+        self.minutely_model = MinutelyModel()
+        view = self.create_timeline_view(self.minutely_model)
+        view.setItemDelegateForColumn(1, PrecipitationDelegate(view))
+        layout.addWidget(view)
+        self.minutely_tab.setLayout(layout)
+
+    # Fixed row heights and column widths, so the view never measures rows it isn't showing
+    def create_timeline_view(self, model):
+        view = QTableView()
+        view.setModel(model)
+        view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        view.setIconSize(QSize(TIMELINE_ICON_SIZE, TIMELINE_ICON_SIZE))
+        view.verticalHeader().setVisible(False)
+        view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        view.verticalHeader().setDefaultSectionSize(TIMELINE_ROW_HEIGHT)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        return view
+
+    # Tab for weather alerts: a scrolling list with one entry per alert
     def create_alerts_tab(self):
         layout = QVBoxLayout()
-        self.alerts_label = QLabel("Weather Alerts will be displayed here.")
-        layout.addWidget(self.alerts_label)
+        alerts_area = QScrollArea()
+        alerts_area.setWidgetResizable(True)
+        alerts_list = QWidget()
+        self.alerts_layout = QVBoxLayout(alerts_list)
+        self.no_alerts_label = QLabel("Weather Alerts will be displayed here.")
+        self.alerts_layout.addWidget(self.no_alerts_label)
+        self.alerts_layout.addStretch()
+        alerts_area.setWidget(alerts_list)
+        layout.addWidget(alerts_area)
+        self.alert_labels = {}
         self.alerts_tab.setLayout(layout)
 
     # Tab for solar weather
@@ -263,6 +583,8 @@ class WeatherApp(QMainWindow):
         # Create placeholders for the labels that will be updated later
         self.solar_column1_label = QLabel("Loading Solar Data...")
         self.solar_column2_label = QLabel("Loading Band Conditions...")
+        self.view_widgets['solar.column1'] = self.solar_column1_label
+        self.view_widgets['solar.column2'] = self.solar_column2_label
 
         # Add the placeholders to the layout (two columns)
         main_layout = QHBoxLayout()
@@ -288,171 +610,551 @@ class WeatherApp(QMainWindow):
         # Set the layout for the tab
         self.solar_weather_tab.setLayout(layout)
 
+    # Tab for history trends: pick a series and a time window
+    def create_trends_tab(self):
+        layout = QVBoxLayout()
+        controls = QHBoxLayout()
+        self.trend_series_combo = QComboBox()
+        for title, series in TREND_SERIES:
+            self.trend_series_combo.addItem(title, series)
+        controls.addWidget(self.trend_series_combo)
+        self.trend_window_combo = QComboBox()
+        for title, seconds in TREND_WINDOWS:
+            self.trend_window_combo.addItem(title, seconds)
+        controls.addWidget(self.trend_window_combo)
+        controls.addStretch()
+        layout.addLayout(controls)
+
+        self.trend_chart = TrendChart()
+        layout.addWidget(self.trend_chart)
+        self.trend_series_combo.currentIndexChanged.connect(self.update_trends)
+        self.trend_window_combo.currentIndexChanged.connect(self.update_trends)
+
+        self.trends_tab.setLayout(layout)
+
+    # Tab for the multi-site overview: one compact row per configured location
+    def create_sites_tab(self):
+        layout = QVBoxLayout()
 
-    def load_weather_data(self):
-        geocode_data = geocode_location(zip_code)
-        if geocode_data:
-            city = geocode_data.get('name')
-            lat = geocode_data.get('lat')
-            lon = geocode_data.get('lon')
-            country = geocode_data.get('country')
-
-            state_code, state_name = "", ""
-            if country == "US":
-                state_code, state_name = get_state_from_zip(zip_code)
-
-            state_display = f"{state_name} ({state_code})" if state_name else country
-            self.location_label.setText(f"Weather Information for {city}, {state_display}")
-
-            weather_data = get_weather(lat, lon)
-            if weather_data:
-                self.update_current_weather(weather_data['current'])
-                self.update_forecast(weather_data['daily'])
-                self.update_alerts(weather_data.get('alerts', []))
-
-            solar_data = get_solar_weather()
-            if solar_data:
-                self.update_solar_weather(solar_data)
-
-    def update_alerts(self, alerts):
-        if alerts:
-            alert_text = ""
-            for alert in alerts:
-                event = alert.get('event', 'N/A')
-                start = time.strftime('%Y-%m-%d %H:%M', time.localtime(alert.get('start', 0)))
-                end = time.strftime('%Y-%m-%d %H:%M', time.localtime(alert.get('end', 0)))
-                description = alert.get('description', 'No description')
-                alert_text += f"Event: {event}\nStart: {start}\nEnd: {end}\n\n{description}\n\n"
-            self.alerts_label.setText(alert_text)
+        # Shared HamQSL summary; solar data is the same for every site
+        self.sites_solar_label = QLabel("Solar: --")
+        layout.addWidget(self.sites_solar_label)
+        self.view_widgets['sites.solar'] = self.sites_solar_label
+
+        self.sites_table = QTableWidget(len(wxcore.sites), len(SITE_COLUMNS))
+        self.sites_table.setHorizontalHeaderLabels(SITE_COLUMNS)
+        self.sites_table.verticalHeader().setVisible(False)
+        self.sites_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.sites_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        for row, site in enumerate(wxcore.sites):
+            for column in range(len(SITE_COLUMNS)):
+                item = QTableWidgetItem("--")
+                self.sites_table.setItem(row, column, item)
+                self.view_widgets[f'site.{row}.{column}'] = item
+            self.sites_table.item(row, 0).setText(site.name)
+            self.sites_table.item(row, 1).setText(site.zip_code)
+        layout.addWidget(self.sites_table)
+
+        self.sites_tab.setLayout(layout)
+
+
+    #### Background refresh pipeline ####
+    # Starts a refresh without blocking the GUI. The OneCall chain (geocode -> weather -> icons)
+    # and the HamQSL fetch run concurrently; results arrive through on_fetch_finished.
+    # A new refresh of a source supersedes one still in flight for that source.
+    def load_weather_data(self, sources=None, interactive=True):
+        if sources is None:
+            sources = self.scheduler.active_sources()
+        if "weather" in sources and "alerts" in self.scheduler.sources:
+            # A full refresh brings the alerts too; start the alerts-only interval over from it
+            sources = [source for source in sources if source != "alerts"]
+            self.scheduler.postpone("alerts", self.next_alerts_due())
+        for source in sources:
+            old_job = self.refresh_jobs.get(source)
+            if old_job is not None:
+                old_job.cancel()
+            job = RefreshJob(source, interactive)
+            self.refresh_jobs[source] = job
+            self.scheduler.started(source)
+
+            if source == "weather":
+                self.start_fetch(job, "location", wxcore.resolve_location, wxcore.zip_code)
+            elif source == "alerts":
+                if self.location is None:  # nothing to poll until the location is resolved
+                    self.finish_refresh(job, self.next_alerts_due())
+                else:
+                    self.start_fetch(job, "alerts", wxcore.get_alerts, self.location['lat'], self.location['lon'])
+            elif source == "solar":
+                self.start_fetch(job, "solar", wxcore.get_solar_weather)
+            elif source == "sites":
+                self.start_fetch(job, "site_locations", wxcore.resolve_site_locations, wxcore.sites)
+        self.schedule_next_refresh()
+
+    #### Auto-refresh ####
+    def on_refresh_timer(self):
+        due = self.scheduler.due_sources()
+        if due:
+            self.load_weather_data(due, interactive=False)
         else:
-            self.alerts_label.setText("No weather alerts available.")
-
-    def update_solar_weather(self, solar_data):
+            self.schedule_next_refresh()
+
+    # Fetch data for hidden tabs that has fallen due, so opening them shows current data
+    def on_idle_timer(self):
+        due = self.scheduler.due_sources(active=False)
+        if due:
+            self.load_weather_data(due, interactive=False)
+
+    # Arm the timer for the next due source; while the window is minimized only alerts are polled
+    def schedule_next_refresh(self):
+        if self.isMinimized():
+            self.idle_timer.stop()
+        elif wxcore.idle_prefetch_delay > 0 and not self.scheduler.busy():
+            self.idle_timer.start(int(wxcore.idle_prefetch_delay * 1000))
+        wakeup = self.scheduler.next_wakeup()
+        if wakeup is None:
+            self.refresh_timer.stop()
+            return  # Nothing to poll, or every source is in flight and re-arms the timer when it finishes
+        delay = min(max(0.0, wakeup - time.time()), MAX_TIMER_DELAY)
+        self.refresh_timer.start(int(delay * 1000))
+
+    # Cancel everything in flight so workers finishing during shutdown don't report back
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        self.idle_timer.stop()
+        for job in self.refresh_jobs.values():
+            job.cancel()
+        self.thread_pool.clear()
+        self.site_pool.clear()
+        if self.tray is not None:
+            self.tray.hide()
+        wxmetrics.stop_server()
+        wxmetrics.close_log()
+        super().closeEvent(event)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            # Only alerts are polled when minimized; catches up on anything that fell due when restored
+            if self.isMinimized():
+                self.scheduler.set_active(MINIMIZED_SOURCES)
+            else:
+                self.activate_tab(self.tabs.currentWidget())
+            self.schedule_next_refresh()
+
+    def finish_refresh(self, job, next_due):
+        if self.refresh_jobs.get(job.source) is job and not job.cancelled:
+            wxmetrics.observe(f"refresh.{job.source}", time.perf_counter() - job.started)
+            self.scheduler.succeeded(job.source, next_due)
+            self.schedule_next_refresh()
+
+    def start_fetch(self, job, kind, fn, *args, pool=None):
+        worker = FetchWorker(job, kind, fn, *args)
+        worker.signals.finished.connect(self.on_fetch_finished)
+        worker.signals.failed.connect(self.on_fetch_failed)
+        (pool or self.thread_pool).start(worker)
+
+    def on_fetch_finished(self, job, kind, result):
+        # Drop results from a refresh that has been superseded
+        if job is not self.refresh_jobs.get(job.source):
+            return
+
+        if kind == "location":
+            self.show_location(result)
+            wxcore.snapshot.put('location', {**result, 'zip_code': wxcore.zip_code})
+            self.refresh_weather(job, result['lat'], result['lon'])
+        elif kind == "weather":
+            weather_data, age = result  # age > 0 when a broker served it from its cache
+            self.show_weather(job, weather_data, age)
+            self.finish_refresh(job, self.next_weather_due(weather_data, time.time() - age))
+            self.update_trends()
+        elif kind == "alerts":
+            if self.weather_data is not None:
+                self.weather_data = {**self.weather_data, 'alerts': result}
+            self.update_alerts(job, result)
+            self.finish_refresh(job, self.next_alerts_due())
+        elif kind == "solar":
+            # Parsed on the worker; a download that doesn't parse arrives at on_fetch_failed
+            solar_xml, solar = result
+            self.show_solar(solar)
+            wxcore.snapshot.put('solar', solar_xml.decode('latin-1'))
+            self.update_trends()
+            self.finish_refresh(job, wxschedule.next_solar_due(solar.updated, interval=wxcore.solar_refresh_interval))
+        elif kind == "site_locations":
+            self.refresh_sites(job, result)
+        elif kind == "trends":
+            self.show_trend(*result)
+        elif kind == "site_weather":
+            cell, weather_data, age, error = result
+            if weather_data is not None:
+                self.site_weather[cell] = (weather_data, time.time() - age)
+            if error is not None:
+                job.errors.append(error)
+            self.render_site_rows(cell, error)
+            job.pending -= 1
+            if job.pending == 0:
+                # One refresh is one failure for the backoff, however many cells failed
+                if job.errors:
+                    self.fail_refresh(job, f"{len(job.errors)} of {len(self.site_cells)} site fetches failed: {job.errors[-1]}")
+                else:
+                    self.finish_refresh(job, self.next_sites_due())
+        elif kind == "icon":
+            icon, image = result
+            pixmap = QPixmap.fromImage(image)
+            self.icon_pixmaps.put(icon, pixmap)
+            self.icon_loaded(icon, pixmap, job.icon_targets.get(icon, []))
+
+    # Stale-while-revalidate: render any cached OneCall payload at once, and only call the
+    # API when it is older than the TTL (stretched by the quota budget as calls run low)
+    def refresh_weather(self, job, lat, lon):
+        weather_data, age = wxcore.onecall_cache.get(wxcore.onecall_key(lat, lon))
+        if weather_data is not None:
+            self.show_weather(job, weather_data, age)
+        if weather_data is None or age >= wxcore.onecall_max_age():
+            wxmetrics.count("cache.onecall.miss")
+            self.start_fetch(job, "weather", wxcore.get_weather, lat, lon)
+        else:
+            wxmetrics.count("cache.onecall.hit")
+            # Cached data is still current; nothing to fetch until it can be newer
+            self.finish_refresh(job, self.next_weather_due(weather_data, time.time() - age))
+
+    # Function to compute when a OneCall refetch can return newer data than weather_data
+    def next_weather_due(self, weather_data, fetched):
+        return wxschedule.next_weather_due(fetched, weather_data.get('current', {}).get('dt'),
+                                           wxcore.onecall_max_age(), wxcore.weather_refresh_interval)
+
+    # Hourly and minutely blocks are parsed into compact series once per payload and not kept as dicts
+    def show_weather(self, job, weather_data, age):
+        with wxmetrics.span("parse.timeline"):
+            self.hourly = wxtimeline.parse_hourly(weather_data)
+            self.minutely = wxtimeline.parse_minutely(weather_data)
+        self.weather_data = wxtimeline.without_timeline(weather_data)
+        self.weather_age = age
+        self.render_weather()
+        self.update_alerts(job, weather_data.get('alerts', []))
+        self.request_icons(job, weather_data)
+
+        self.statusBar().showMessage(f"Weather updated {format_age(age)} - OneCall calls left today: {wxcore.onecall_budget.remaining()}")
+
+    # Function to compute when the next alerts-only poll is due; stretched like OneCall when calls run low
+    def next_alerts_due(self):
+        return time.time() + max(wxcore.alert_poll_interval, wxcore.onecall_budget.min_interval())
+
+    #### Alerts ####
+    # Compare the alerts with the last set, update only the list entries that changed, and
+    # notify about new or escalated alerts. The first set (e.g. from the startup snapshot)
+    # is the baseline and never notifies; nor does anything not from a fetch (job is None).
+    def update_alerts(self, job, alerts):
+        current = wxalerts.parse(alerts)
+        baseline = self.alerts is None
+        changes = wxalerts.diff(self.alerts or {}, current)
+        self.alerts = current
+        if not changes and not baseline:
+            return
+        count = len(current)
+        self.tabs.setTabText(self.tabs.indexOf(self.alerts_tab), f"Weather Alerts ({count})" if count else "Weather Alerts")
+        self.render_alerts()
+        if job is not None and not baseline:
+            self.notify_alerts(changes)
+
+    def render_alerts(self):
+        if self.alert_labels is None or self.alerts is None:
+            return  # tab not built yet, or nothing loaded
+        with wxmetrics.span("render.alerts"):
+            for key in [key for key in self.alert_labels if key not in self.alerts]:
+                label = self.alert_labels.pop(key)
+                self.alerts_layout.removeWidget(label)
+                label.deleteLater()
+            # Alerts are in start order; entry i sits below the "no alerts" label
+            for index, (key, alert) in enumerate(self.alerts.items()):
+                text = alert.text()
+                label = self.alert_labels.get(key)
+                if label is None:
+                    label = QLabel()
+                    label.setWordWrap(True)
+                    label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+                    label.setStyleSheet("border-bottom: 1px solid lightgray; padding: 4px;")
+                    self.alerts_layout.insertWidget(index + 1, label)
+                    self.alert_labels[key] = label
+                if label.text() != text:
+                    wxmetrics.count("view.widget_updates")
+                    label.setText(text)
+            self.no_alerts_label.setText("No weather alerts available.")
+            self.no_alerts_label.setVisible(not self.alerts)
+
+    def notify_alerts(self, changes):
+        message = wxalerts.notification(changes)
+        if message is None or not wxcore.alert_notify:
+            return
+        wxmetrics.count("alerts.notifications")
+        if self.tray is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MessageBoxWarning), self)
+            self.tray.setToolTip("SMW Weather App")
+            self.tray.messageClicked.connect(self.show_alerts_tab)
+            self.tray.show()
+        if self.tray is not None:
+            self.tray.showMessage(*message, QSystemTrayIcon.MessageIcon.Warning, ALERT_MESSAGE_MS)
+        else:
+            title, text = message
+            self.statusBar().showMessage(f"{title}: {text.replace(chr(10), '; ')}")
+
+    def show_alerts_tab(self):
+        self.showNormal()
+        self.activateWindow()
+        self.tabs.setCurrentWidget(self.alerts_tab)
+
+    #### Startup snapshot ####
+    # Render the last saved location, weather and solar data without any network I/O.
+    # Icons come from the disk cache only; the refresh that follows fills in anything missing.
+    def restore_snapshot(self):
+        location, _ = wxcore.snapshot.get('location')
+        if location is not None and location.get('zip_code') == wxcore.zip_code:
+            self.show_location(location)
+            weather_data, age = wxcore.onecall_cache.get(wxcore.onecall_key(location['lat'], location['lon']))
+            if weather_data is not None:
+                self.show_weather(None, weather_data, age)
+                self.statusBar().showMessage(f"Showing saved weather from {format_age(age)} - refreshing...")
+
+        solar_xml, _ = wxcore.snapshot.get('solar')
+        if solar_xml is not None:
+            # Stored as latin-1 text, which maps back to the original bytes exactly
+            try:
+                self.show_solar(wxcore.parse_solar(solar_xml.encode('latin-1')))
+            except wxcore.FetchError as e:
+                print(f"Error: {e}")
+
+    def show_location(self, location):
+        self.apply_view(wxview.location_view(location))
+        self.location = location
+
+    # Push only the view entries that differ from what is on screen, with repaints held
+    # until the whole batch is applied. An unchanged refresh touches no widgets.
+    # Entries for tabs not built yet are skipped and pushed when the tab is first shown.
+    def apply_view(self, view):
+        changed = self.view_state.changes({key: value for key, value in view.items() if key in self.view_widgets})
+        if not changed:
+            return
+        wxmetrics.count("view.widget_updates", len(changed))
+        self.setUpdatesEnabled(False)
         try:
-            # Parse the XML data
-            root = ET.fromstring(solar_data)
-            solar_info = root.find('solardata')
-
-            if solar_info is None:
-                print("Error: No 'solardata' element found in the XML")
-                QMessageBox.warning(None, "Error", "Failed to parse solar weather data.")
-                return
-
-            # Extract main solar data
-            solar_flux = solar_info.find('solarflux').text
-            sunspots = solar_info.find('sunspots').text
-            aindex = solar_info.find('aindex').text
-            kindex = solar_info.find('kindex').text
-            geomag_field = solar_info.find('geomagfield').text
-            signal_to_noise = solar_info.find('signalnoise').text
-
-            # Extract band conditions and apply color coding
-            conditions = solar_info.find('calculatedconditions')
-            band_conditions_day = "\n".join([f"{band.get('name')}: {self.get_colored_condition(band.text)}" 
-                                            for band in conditions.findall("band") if band.get("time") == "day"])
-            band_conditions_night = "\n".join([f"{band.get('name')}: {self.get_colored_condition(band.text)}" 
-                                            for band in conditions.findall("band") if band.get("time") == "night"])
-
-            # Create the text for column 1 (A Index, K Index, Solar Flux, etc.)
-            column1_text = (f"A Index: ............{aindex}\n"
-                            f"K Index: ............{kindex}\n"
-                            f"Solar Flux: .........{solar_flux}\n"
-                            f"Sunspots: ...........{sunspots}\n"
-                            f"Signal to Noise: ....{signal_to_noise}\n"
-                            f"Geomagnetic Field: ..{geomag_field}")
-
-            # Create the text for column 2 (Band Conditions Day/Night) and add the color-coded conditions
-            column2_text = (f"Band Conditions (Day):<br>{band_conditions_day}<br><br>"
-                            f"Band Conditions (Night):<br>{band_conditions_night}")
-
-            # Update the labels with new data (using HTML for styling)
-            self.solar_column1_label.setText(column1_text)
-            self.solar_column2_label.setText(column2_text)
-
-        except ET.ParseError as e:
-            print(f"Error parsing solar weather data: {e}")
-            QMessageBox.warning(None, "Error", "Failed to parse solar weather data.")
-
-    # Function to return color-coded band conditions
-    def get_colored_condition(self, condition):
-        if condition == "Excellent":
-            return f'<span style="color: blue;">{condition}<br></span>'
-        elif condition == "Good":
-            return f'<span style="color: green;">{condition}<br></span>'
-        elif condition == "Poor":
-            return f'<span style="color: red;">{condition}<br></span>'
+            for key, text in changed.items():
+                self.view_widgets[key].setText(text)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    # Function to show an icon just added to the shared cache; the Hourly table redraws its rows too
+    def icon_loaded(self, icon, pixmap, keys):
+        for key in keys:
+            self.show_icon(key, icon, pixmap)
+        if self.hourly_model is not None:
+            self.hourly_model.icon_loaded(icon)
+
+    def show_icon(self, key, icon, pixmap):
+        widget = self.view_widgets.get(key)
+        if widget is not None and self.view_state.changes({key: icon}):
+            widget.setPixmap(pixmap)
+
+    #### Sites overview ####
+    # Group the resolved sites by grid cell, show cached data at once and fetch stale cells
+    # on the bounded site pool. Rows fill in as each cell's result arrives.
+    def refresh_sites(self, job, site_list):
+        self.site_list = site_list
+        self.render_site_locations()
+
+        self.site_cells = wxsites.group_by_cell(site_list, wxcore.site_grid_degrees)
+        max_age = wxcore.onecall_max_age()
+        job.pending = 0
+        for cell in self.site_cells:
+            weather_data, age = wxcore.onecall_cache.get(wxcore.onecall_key(*cell, wxsites.ONECALL_EXCLUDE))
+            if weather_data is not None:
+                self.site_weather[cell] = (weather_data, time.time() - age)
+                self.render_site_rows(cell)
+            if weather_data is None or age >= max_age:
+                wxmetrics.count("cache.onecall.miss")
+                self.start_fetch(job, "site_weather", wxcore.get_site_weather, cell, pool=self.site_pool)
+                job.pending += 1
+            else:
+                wxmetrics.count("cache.onecall.hit")
+        if job.pending == 0:
+            self.finish_refresh(job, self.next_sites_due())
+
+    def next_sites_due(self):
+        return time.time() + max(wxcore.weather_refresh_interval, wxcore.onecall_max_age())
+
+    def render_site_rows(self, cell, error=None):
+        rows = self.site_cells.get(cell, [])
+        if cell not in self.site_weather:
+            self.apply_view({f'site.{row}.4': f"Error: {error}" for row in rows})
+            return
+        weather_data, fetched = self.site_weather[cell]
+        current = wxunits.convert_block(weather_data['current'], wxcore.units)
+        unit_labels = wxunits.UNIT_LABELS[wxcore.units]
+        values = [
+            f"{current.get('temp', '--')}{unit_labels['temp']}",
+            current['weather'][0]['description'] if error is None else f"{current['weather'][0]['description']} (stale)",
+            f"{current.get('wind_speed', '--')} {unit_labels['speed']} @ {current.get('wind_deg', '--')}°",
+            str(len(weather_data.get('alerts', []))),
+            time.strftime('%H:%M', time.localtime(fetched)),
+        ]
+        self.apply_view({f'site.{row}.{column}': value
+                         for row in rows for column, value in enumerate(values, start=3)})
+
+    def render_site_locations(self):
+        view = {}
+        for row, site in enumerate(self.site_list):
+            if site.location is not None:
+                location = site.location
+                view[f'site.{row}.2'] = f"{location['city']}, {location['state_code'] or location['country']}"
+            else:
+                view[f'site.{row}.2'] = f"Error: {site.error}"
+        self.apply_view(view)
+
+    def render_sites(self):
+        self.render_site_locations()
+        for cell in self.site_cells:
+            self.render_site_rows(cell)
+
+    #### Tabs ####
+    # Build the tab if needed and fetch its data at once if it has fallen due while hidden
+    def on_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        self.activate_tab(tab)
+        due = self.scheduler.due_sources()
+        if due:
+            self.load_weather_data(due, interactive=False)
         else:
-            return condition  # Return condition unstyled if not one of the known types
-
-
-
-
-    def update_current_weather(self, current):
-        temp = current.get('temp', 0)
-        feels_like = current.get('feels_like', 0)
-        pressure = current.get('pressure', 0)
-        humidity = current.get('humidity', 0)
-        dew_point = current.get('dew_point', 0)
-        clouds = current.get('clouds', 0)
-        visibility = current.get('visibility', 0)
-        wind_speed = current.get('wind_speed', 0)
-        wind_gust = current.get('wind_gust', 0)
-        wind_deg = current.get('wind_deg', 0)
-        sunrise_unix = current.get('sunrise', 0)
-        sunset_unix = current.get('sunset', 0)
-        weather_desc = current['weather'][0]['description']
-        weather_icon = current['weather'][0]['icon']
-
-        sunrise = time.strftime('%I:%M %p', time.localtime(sunrise_unix))
-        sunset = time.strftime('%I:%M %p', time.localtime(sunset_unix))
-        degree_unit = "°C" if units == "metric" else "°F"
-        visibility_km = visibility / 1000
-
-        self.tempa_label.setText(f"Temperature: {temp}{degree_unit}")
-        self.feels_like_label.setText(f"Feels Like: {feels_like}{degree_unit}")
-        self.humidity_label.setText(f"Humidity: {humidity}%")
-        self.dew_point_label.setText(f"Dew Point: {dew_point}{degree_unit}")
-        self.pressure_label.setText(f"Pressure: {pressure} hPa")
-        self.wind_speed_label.setText(f"Wind Speed: {wind_speed} m/s @ {wind_deg}°")
-        self.wind_gust_label.setText(f"Wind Gusts: {wind_gust} m/s")
-        self.weather_desc_label.setText(f"Weather: {weather_desc}")
-        self.clouds_label.setText(f"Cloud Cover: {clouds}%")
-        self.visibility_label.setText(f"Visibility: {visibility_km} km")
-        self.sunrise_label.setText(f"Sunrise: {sunrise}")
-        self.sunset_label.setText(f"Sunset: {sunset}")
-
-        icon_url = f"{ICON_URL}{weather_icon}@2x.png"
-        pixmap = QPixmap()
-        pixmap.loadFromData(requests.get(icon_url).content)
-        self.weather_icon_label.setPixmap(pixmap)
-
-    def update_forecast(self, daily):
-        degree_unit = "°C" if units == "metric" else "°F"
+            self.schedule_next_refresh()
+        if tab is self.trends_tab:
+            self.update_trends()
+
+    # Re-render everything already loaded; only widgets that exist and changed are touched
+    def render_all(self):
+        self.render_weather()
+        self.render_alerts()
+        if self.weather_data is not None:
+            self.request_icons(None, self.weather_data)
+        self.render_solar()
+        self.render_sites()
+
+    #### Trends ####
+
+    # Query the history (downsampled to about one point per pixel) on a worker thread, so a
+    # long window or a compaction holding the history lock doesn't block the window.
+    # The chart is redrawn in show_trend; a newer query supersedes one still running.
+    def update_trends(self):
+        if self.tabs.currentWidget() is not self.trends_tab:
+            return
+        old_job = self.refresh_jobs.get("trends")
+        if old_job is not None:
+            old_job.cancel()
+        job = RefreshJob("trends")
+        self.refresh_jobs["trends"] = job
+        series = self.trend_series_combo.currentData()
+        location = wxcore.history_location(self.location['lat'], self.location['lon']) if self.location else ""
+        self.start_fetch(job, "trends", wxcore.get_trend, series, location,
+                         self.trend_window_combo.currentData(), max(50, self.trend_chart.width()))
+
+    def show_trend(self, points, start, end):
+        if self.trend_series_combo.currentData() == "temp" and wxcore.units == "imperial":
+            points = [(ts, wxunits.c_to_f(low), wxunits.c_to_f(high)) for ts, low, high in points]
+        self.trend_chart.set_points(points, start, end)
+
+    # Convert the raw payload to the display units in one pass and update the tabs; no network I/O
+    def render_weather(self):
+        if self.weather_data is None:
+            return
+        with wxmetrics.span("render.weather"):
+            with wxmetrics.span("convert.onecall"):
+                display_data = wxunits.convert_onecall(self.weather_data, wxcore.units)
+            self.apply_view({**wxview.current_view(display_data['current'], wxcore.units),
+                             **wxview.forecast_view(display_data['daily'], wxcore.units),
+                             **wxview.minutely_view(self.minutely)})
+            if self.hourly_model is not None:
+                self.hourly_model.set_series(self.hourly, wxcore.units)
+            if self.minutely_model is not None:
+                self.minutely_model.set_series(self.minutely, wxcore.units)
+
+    def on_fetch_failed(self, job, kind, message):
+        if job is not self.refresh_jobs.get(job.source):
+            return
+        wxmetrics.count(f"errors.{kind}")
+        # A missing icon is not worth interrupting the user for
+        if kind == "icon":
+            print(f"Error: {message}")
+            return
+        self.fail_refresh(job, message)
+
+    # Back off the job's source and report the error: in a message box for refreshes the
+    # user asked for, in the status bar for scheduled ones
+    def fail_refresh(self, job, message):
+        self.scheduler.failed(job.source)
+        self.schedule_next_refresh()
+        if job.interactive:
+            QMessageBox.warning(self, "Error", message)
+        else:
+            self.statusBar().showMessage(f"Error: {message} - retrying automatically")
+
+    # Show cached icons right away; load each missing icon once, all in parallel.
+    # With no job (startup snapshot) icons are read from the disk cache only.
+    def request_icons(self, job, weather_data):
+        wanted = {'icon.current': weather_data['current']['weather'][0]['icon']}
         for i in range(5):
-            day_data = daily[i]
-            dt = time.strftime('%A', time.localtime(day_data['dt']))
-            temp_max = day_data['temp']['max']
-            temp_min = day_data['temp']['min']
-            weather_desc = day_data['weather'][0]['description']
-            weather_icon = day_data['weather'][0]['icon']
-            pop = int(day_data['pop'] * 100)
-
-            day_label, day_icon_label, temp_label, precip_label = self.forecast_columns[i]
-            day_label.setText(dt)
-            icon_url = f"{ICON_URL}{weather_icon}@2x.png"
-            pixmap = QPixmap()
-            pixmap.loadFromData(requests.get(icon_url).content)
-            day_icon_label.setPixmap(pixmap)
-            #temp_label.setText(f"High: {temp_max}{degree_unit} / Low: {temp_min}{degree_unit}")
-            # Update temperature (high/low) with dynamic unit
-            temp_label.setText(f'<font color="red">{temp_max}{degree_unit}</font> / <font color="blue">{temp_min}{degree_unit}</font>')
-            precip_label.setText(f"{weather_desc.title()} - {pop}%")
+            wanted[f'icon.forecast.{i}'] = weather_data['daily'][i]['weather'][0]['icon']
+        icon_targets = {}
+        for key, icon in wanted.items():
+            if self.view_state.rendered(key) != icon:  # already showing this icon
+                icon_targets.setdefault(icon, []).append(key)
+        # The Hourly table reads the shared icon cache directly; make sure its icons are in it
+        if self.hourly is not None and wxcore.show_hourly:
+            for icon in set(self.hourly.icon):
+                if icon and icon not in self.icon_pixmaps:
+                    icon_targets.setdefault(icon, [])
+        if job is not None:
+            job.icon_targets = icon_targets
+
+        for icon, keys in icon_targets.items():
+            pixmap = self.icon_pixmaps.get(icon)
+            wxmetrics.count("cache.icon_memory.hit" if pixmap is not None else "cache.icon_memory.miss")
+            if pixmap is not None:
+                for key in keys:
+                    self.show_icon(key, icon, pixmap)
+                continue
+            if job is None:
+                data = wxcore.icon_disk_cache.get(icon)
+                if data is not None:
+                    pixmap = QPixmap()
+                    pixmap.loadFromData(data)
+                    self.icon_pixmaps.put(icon, pixmap)
+            if pixmap is not None:
+                self.icon_loaded(icon, pixmap, keys)
+            elif job is not None:
+                self.start_fetch(job, "icon", get_weather_icon, icon)
+
+    # Show a parsed wxsolar.SolarData
+    def show_solar(self, solar):
+        self.solar = solar
+        self.render_solar()
+
+    def render_solar(self):
+        if self.solar is not None:
+            with wxmetrics.span("render.solar"):
+                self.apply_view(wxview.solar_view(self.solar))
 
     def open_settings_dialog(self):
+        old_settings = (wxcore.zip_code, wxcore.units, wxcore.API_KEY)
         settings_dialog = SettingsDialog(self)
         if settings_dialog.exec() == QDialog.DialogCode.Accepted:
-            save_settings()
-            self.load_weather_data()
+            wxcore.save_settings()
+            # Only refetch what the change requires; solar data doesn't depend on any setting
+            if (wxcore.zip_code, wxcore.API_KEY) != (old_settings[0], old_settings[2]):
+                self.alerts = None  # the new location's alerts are a new baseline, not news
+                self.load_weather_data(["weather"])
+            elif wxcore.units != old_settings[1]:
+                self.render_weather()
+                self.render_sites()
+                self.update_trends()
+
+    def open_diagnostics_dialog(self):
+        DiagnosticsDialog(self).exec()
 
     def open_about_dialog(self):
         QMessageBox.information(self, "About", "SMW Weather App\nVersion 1.0\nDeveloped by Chengmania on Sunday afternoon in October of 2024 free for use and modification")
@@ -465,15 +1167,15 @@ class SettingsDialog(QDialog):
         self.setGeometry(400, 200, 300, 200)
 
         layout = QFormLayout()
-        self.zip_input = QLineEdit(zip_code)
+        self.zip_input = QLineEdit(wxcore.zip_code)
         layout.addRow("Zip Code:", self.zip_input)
 
         self.unit_combo = QComboBox()
         self.unit_combo.addItems(["Celsius", "Fahrenheit"])
-        self.unit_combo.setCurrentText("Celsius" if units == "metric" else "Fahrenheit")
+        self.unit_combo.setCurrentText("Celsius" if wxcore.units == "metric" else "Fahrenheit")
         layout.addRow("Units:", self.unit_combo)
 
-        self.api_key_input = QLineEdit(API_KEY)
+        self.api_key_input = QLineEdit(wxcore.API_KEY)
         layout.addRow("API Key:", self.api_key_input)
 
         save_button = QPushButton("Save")
@@ -483,13 +1185,78 @@ class SettingsDialog(QDialog):
         self.setLayout(layout)
 
     def save_settings(self):
-        global zip_code, units, API_KEY
-        zip_code = self.zip_input.text()
-        units = "metric" if self.unit_combo.currentText() == "Celsius" else "imperial"
-        API_KEY = self.api_key_input.text()
+        wxcore.zip_code = self.zip_input.text()
+        wxcore.units = "metric" if self.unit_combo.currentText() == "Celsius" else "imperial"
+        wxcore.API_KEY = self.api_key_input.text()
         QMessageBox.information(self, "Settings Saved", "Settings have been updated!")
         self.accept()
 
+# Help -> Diagnostics: live timings and counters from wxmetrics
+class DiagnosticsDialog(QDialog):
+    def __init__(self, parent=None):
+        super(DiagnosticsDialog, self).__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setGeometry(150, 150, 640, 480)
+
+        layout = QVBoxLayout()
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.spans_table = self.create_table(["Stage", "Count", "Last ms", "Mean ms", "p95 ms", "Max ms"])
+        layout.addWidget(self.spans_table, 2)
+        self.counters_table = self.create_table(["Counter", "Value"])
+        layout.addWidget(self.counters_table, 1)
+
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        buttons.addWidget(reset_button)
+        buttons.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+        # Refresh while open so a running refresh can be watched
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def create_table(self, headers):
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        return table
+
+    def fill_table(self, table, rows):
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+
+    def refresh(self):
+        if not wxmetrics.enabled:
+            self.summary_label.setText("Instrumentation is off ([Diagnostics] enabled = false in wxconfig.ini).")
+            return
+        data = wxmetrics.snapshot()
+        status = [f"Since {time.strftime('%H:%M:%S', time.localtime(data['since']))}"]
+        if wxcore.metrics_port:
+            status.append(f"metrics at http://127.0.0.1:{wxcore.metrics_port}/metrics")
+        self.summary_label.setText(" - ".join(status))
+        self.fill_table(self.spans_table, [
+            (name, str(s['count']), f"{s['last'] * 1000:.1f}", f"{s['mean'] * 1000:.1f}",
+             f"{s['p95'] * 1000:.1f}", f"{s['max'] * 1000:.1f}")
+            for name, s in sorted(data['spans'].items())])
+        self.fill_table(self.counters_table, [(name, str(value)) for name, value in sorted(data['counters'].items())])
+
+    def reset(self):
+        wxmetrics.reset()
+        self.refresh()
+
 if __name__ == '__main__':
     app = QApplication(sys.argv)
     load_settings()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# Weather alert tracking for smwPyWx.
+# Each OneCall alert gets a stable identity (sender, event, start), so successive
+# refreshes can be compared: the Weather Alerts tab only adds, updates or removes the
+# entries that changed, and only alerts that are new or escalated (e.g. a Winter Storm
+# Watch upgraded to a Warning) raise a desktop notification. No Qt here.
+
+import time
+
+# OneCall blocks left out of an alerts-only poll; alerts are always included
+ALERTS_ONLY_EXCLUDE = "current,minutely,hourly,daily"
+
+DEFAULT_POLL_INTERVAL = 0  # seconds between alerts-only polls; 0 = only with the full refresh
+
+# NWS alert levels, least to most severe, as the last word of the event name
+LEVELS = ("Statement", "Advisory", "Watch", "Warning", "Emergency")
+
+
+class Alert:
+    __slots__ = ('key', 'sender', 'event', 'start', 'end', 'description')
+
+    def __init__(self, sender, event, start, end, description):
+        self.key = (sender, event, start)
+        self.sender = sender
+        self.event = event
+        self.start = start
+        self.end = end
+        self.description = description
+
+    # Function to return the alert's level (index in LEVELS), or -1 if it has none
+    @property
+    def level(self):
+        word = self.event.rsplit(' ', 1)[-1]
+        return LEVELS.index(word) if word in LEVELS else -1
+
+    # Function to return the hazard without its level, e.g. "Winter Storm" for a Winter Storm Watch
+    @property
+    def hazard(self):
+        return self.event.rsplit(' ', 1)[0] if self.level >= 0 else self.event
+
+    def text(self):
+        start = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.start))
+        end = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.end))
+        return f"Event: {self.event}\nFrom: {self.sender}\nStart: {start}\nEnd: {end}\n\n{self.description}"
+
+    def same_content(self, other):
+        return self.end == other.end and self.description == other.description
+
+
+# What changed between two alert sets; escalated alerts are also in added
+class AlertChanges:
+    __slots__ = ('added', 'updated', 'removed', 'escalated')
+
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.removed = []
+        self.escalated = []
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+
+# Function to key the OneCall alerts list by identity, in start order.
+# The same alert issued twice in one response is kept once.
+def parse(alerts):
+    parsed = {}
+    for alert in sorted(alerts or (), key=lambda a: a.get('start', 0)):
+        entry = Alert(alert.get('sender_name', ''), alert.get('event', 'N/A'), alert.get('start', 0),
+                      alert.get('end', 0), alert.get('description', 'No description'))
+        parsed.setdefault(entry.key, entry)
+    return parsed
+
+
+def diff(previous, current):
+    changes = AlertChanges()
+    for key, alert in current.items():
+        old = previous.get(key)
+        if old is None:
+            changes.added.append(alert)
+            if any(p.sender == alert.sender and p.hazard == alert.hazard and p.level < alert.level
+                   for p in previous.values()):
+                changes.escalated.append(alert)
+        elif not alert.same_content(old):
+            changes.updated.append(alert)
+    changes.removed = [alert for key, alert in previous.items() if key not in current]
+    return changes
+
+
+# Function to return the (title, message) of a desktop notification, or None if nothing is worth one
+def notification(changes):
+    if not changes.added:
+        return None
+    escalated = {alert.key for alert in changes.escalated}
+    lines = [f"{'Upgraded to' if alert.key in escalated else 'New'}: {alert.event}" for alert in changes.added]
+    noun = "Weather alerts" if len(lines) > 1 else "Weather alert"
+    title = f"{noun} upgraded" if escalated else f"New {noun.lower()}"
+    return title, "\n".join(lines)
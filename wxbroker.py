@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+# Shared local fetch broker for smwPyWx (run as: python smwPyWx.py --broker).
+# On terminal servers many app instances want the same OneCall, HamQSL, icon and
+# geocoding data. One broker process does the upstream fetching for all of them over
+# a Unix socket or a localhost port: identical requests in flight are merged into one,
+# results are cached for every client, and the OneCall TTL and daily quota are applied
+# in one place with the broker's own wxconfig.ini. Clients configured with a [Broker]
+# section go through it and fall back to fetching directly if it isn't running.
+
+import argparse
+import http.client
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlencode, urlparse
+
+DEFAULT_TCP_ADDRESS = "127.0.0.1:8766"
+# The default socket lives in a directory only this user can enter, so other users can't
+# use the broker (and its API key quota) or take its place
+SOCKET_DIR = os.path.join(os.environ.get('XDG_RUNTIME_DIR') or os.path.expanduser(os.path.join('~', '.cache')),
+                          'smwpywx')
+DEFAULT_ADDRESS = (f"unix:{os.path.join(SOCKET_DIR, 'broker.sock')}"
+                   if hasattr(socket, 'AF_UNIX') else DEFAULT_TCP_ADDRESS)
+DEFAULT_TIMEOUT = 60.0       # seconds a client waits; the broker may be retrying upstream
+DEFAULT_RETRY_SECONDS = 30   # after a failed connect, fetch directly this long before trying again
+DEFAULT_SOLAR_TTL = 5 * 60   # seconds the broker reuses a HamQSL download
+LISTEN_BACKLOG = 128         # every instance on the host may refresh at the same moment
+
+
+class BrokerUnavailable(Exception):
+    pass
+
+
+# The broker can't listen on its address, e.g. another broker is already serving it
+class BrokerAddressInUse(Exception):
+    pass
+
+
+# The broker answered, but its upstream fetch failed
+class BrokerError(Exception):
+    pass
+
+
+# Function to split "unix:/path/to.sock" or "host:port" into (family, target)
+def parse_address(address):
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+#### Client side ####
+
+class BrokerClient:
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=DEFAULT_TIMEOUT, retry_seconds=DEFAULT_RETRY_SECONDS):
+        self.address = address
+        self.family, self.target = parse_address(address)
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._down_until = 0.0
+
+    def _connection(self):
+        if self.family == 'unix':
+            return UnixHTTPConnection(self.target, self.timeout)
+        return http.client.HTTPConnection(*self.target, timeout=self.timeout)
+
+    # Function to GET a broker path and return the body. Raises BrokerUnavailable if the
+    # broker can't be reached (and skips it for retry_seconds), BrokerError if it reports
+    # an upstream failure.
+    def get(self, path, **params):
+        if time.monotonic() < self._down_until:
+            raise BrokerUnavailable(f"broker at {self.address} was unreachable")
+        connection = self._connection()
+        try:
+            connection.request('GET', f"{path}?{urlencode(params)}" if params else path)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as e:
+            self._down_until = time.monotonic() + self.retry_seconds
+            raise BrokerUnavailable(f"broker at {self.address} unreachable: {e}")
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise BrokerError(body.decode('utf-8', 'replace') or f"broker returned HTTP {response.status}")
+        return body
+
+
+#### Broker side ####
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# Merges concurrent calls with the same key: the first caller runs fn, the rest wait for its result
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0  # calls answered by another caller's fetch
+
+    def run(self, key, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn(*args)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
+
+
+class Broker:
+    def __init__(self, wxcore, solar_ttl=DEFAULT_SOLAR_TTL):
+        self.wxcore = wxcore
+        self.solar_ttl = solar_ttl
+        self.flight = SingleFlight()
+        self.started = time.time()
+        self.requests = 0
+        self._solar = None  # (XML bytes, fetch time)
+        self._lock = threading.Lock()
+
+    # exclude is the client's OneCall exclude list, so each client gets the blocks it shows
+    def onecall(self, lat, lon, exclude=None):
+        lat, lon = float(lat), float(lon)
+        weather_data, age = self.flight.run(('onecall', self.wxcore.onecall_key(lat, lon, exclude)),
+                                            self.wxcore.get_weather_cached, lat, lon, exclude)
+        return json.dumps({'age': age, 'payload': weather_data}).encode(), 'application/json'
+
+    def solar(self):
+        with self._lock:
+            cached = self._solar
+        if cached is None or time.time() - cached[1] >= self.solar_ttl:
+            content, _ = self.flight.run('solar', self.wxcore.get_solar_weather)
+            cached = (content, time.time())
+            with self._lock:
+                self._solar = cached
+        return cached[0], 'text/xml'
+
+    def icon(self, code):
+        return self.flight.run(('icon', code), self.wxcore.get_icon_data, code), 'image/png'
+
+    def geo(self, zip_code):
+        location = self.flight.run(('zip', zip_code), self.wxcore.resolve_location, zip_code)
+        return json.dumps(location).encode(), 'application/json'
+
+    def status(self):
+        return json.dumps({
+            'uptime': round(time.time() - self.started),
+            'requests': self.requests,
+            'shared': self.flight.shared,
+            'onecall_remaining': self.wxcore.onecall_budget.remaining(),
+        }).encode(), 'application/json'
+
+    # Function to answer one request; returns (status, body, content type)
+    def handle(self, path, query):
+        with self._lock:
+            self.requests += 1
+        try:
+            if path == '/onecall':
+                body, content_type = self.onecall(query['lat'], query['lon'], query.get('exclude'))
+            elif path == '/solar':
+                body, content_type = self.solar()
+            elif path == '/icon':
+                body, content_type = self.icon(query['code'])
+            elif path == '/geo':
+                body, content_type = self.geo(query['zip'])
+            elif path == '/status':
+                body, content_type = self.status()
+            else:
+                return 404, b"unknown path", 'text/plain'
+        except KeyError as e:
+            return 400, f"missing parameter {e}".encode(), 'text/plain'
+        except self.wxcore.FetchError as e:
+            return 502, str(e).encode(), 'text/plain'
+        except Exception as e:  # network errors and the like; the client reports them as fetch errors
+            return 502, f"Error fetching {path.strip('/')} data: {e}".encode(), 'text/plain'
+        return 200, body, content_type
+
+
+# Function to remove a socket left over from a broker that didn't shut down cleanly.
+# Refuses if a broker still answers there, or if the path isn't a socket of ours.
+def remove_stale_socket(path):
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.getuid():
+        raise BrokerAddressInUse(f"{path} exists and is not a broker socket owned by this user")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)  # nothing listening
+    else:
+        raise BrokerAddressInUse(f"a broker is already listening on {path}")
+    finally:
+        probe.close()
+
+
+# Function to create a Unix socket server. The socket is only usable by this user
+# (0o600) unless shared, and the default socket directory is kept private (0o700).
+def make_server(broker, address, shared=False):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import socketserver
+
+    class BrokerHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+            status, body, content_type = broker.handle(url.path, query)
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    family, target = parse_address(address)
+    if family == 'unix':
+        class UnixServer(socketserver.ThreadingUnixStreamServer):
+            daemon_threads = True
+            request_queue_size = LISTEN_BACKLOG  # a full Unix backlog refuses at once instead of queueing
+
+        if os.path.dirname(target) == SOCKET_DIR:
+            os.makedirs(SOCKET_DIR, mode=0o700, exist_ok=True)
+            os.chmod(SOCKET_DIR, 0o700)
+        remove_stale_socket(target)
+        umask = os.umask(0o177)  # no window in which other users can connect
+        try:
+            server = UnixServer(target, BrokerHandler)
+        finally:
+            os.umask(umask)
+        if shared:
+            os.chmod(target, 0o666)  # every user on the host may share the broker
+        return server
+    class TCPServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = LISTEN_BACKLOG
+
+    return TCPServer(target, BrokerHandler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="smwPyWx.py --broker",
+                                     description="Share one set of upstream fetches between smwPyWx instances.")
+    parser.add_argument('--address', help=f"unix:/path/to.sock or host:port (default: {DEFAULT_ADDRESS})")
+    parser.add_argument('--shared', action='store_true', default=None,
+                        help="let every user on the host use the Unix socket (default: [Broker] shared, else off)")
+    parser.add_argument('--config', help="settings file with the API key and quota (default: wxconfig.ini)")
+    parser.add_argument('--solar-ttl', type=float, default=DEFAULT_SOLAR_TTL / 60,
+                        help="minutes to reuse a HamQSL download (default: %(default)s)")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    import wxcore
+    if args.config:
+        wxcore.CONFIG_FILE = args.config
+    wxcore.load_settings()
+    address = args.address or wxcore.broker_address or DEFAULT_ADDRESS
+    wxcore.broker = None         # the broker itself always fetches directly
+    wxcore.history.enabled = False  # each client records its own history
+
+    shared = wxcore.broker_shared if args.shared is None else args.shared
+    try:
+        server = make_server(Broker(wxcore, args.solar_ttl * 60), address, shared)
+    except BrokerAddressInUse as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # still remove the socket when stopped by a service manager
+    print(f"smwPyWx broker listening on {address} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        family, target = parse_address(address)
+        if family == 'unix' and os.path.exists(target):
+            os.remove(target)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+# Response cache, API quota budget and startup snapshot for smwPyWx.
+# OneCall responses are kept on disk with their fetch time so the app can render the
+# last payload immediately and only go back to the API once it is older than the TTL
+# (stale-while-revalidate). The budget counts OneCall calls per UTC day, the period
+# OpenWeather bills by, and stretches the refresh interval as the quota runs out.
+
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 10 * 60            # seconds a OneCall payload is considered fresh
+DEFAULT_DAILY_LIMIT = 1000       # OneCall calls per day before billing starts
+DEFAULT_THROTTLE_AT = 0.8        # fraction of the quota after which refreshes are spread out
+DEFAULT_MAX_ENTRIES = 32         # cached payloads kept for locations other than the monitored sites
+
+
+# Function to write JSON atomically so a crash never leaves a truncated cache file
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+# Function to read a JSON file, returning default if it is missing or corrupt
+def read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+# Persistent cache of JSON payloads with their fetch time
+class ResponseCache:
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = None
+        self._lock = threading.Lock()
+
+    # Function to build a cache key for a OneCall request
+    @staticmethod
+    def key(lat, lon, units, exclude):
+        return f"{float(lat):.4f},{float(lon):.4f},{units},{exclude}"
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = read_json(self.path, {})
+        return self._entries
+
+    # Returns (payload, age in seconds) or (None, None) when nothing is cached
+    def get(self, key):
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None:
+            return None, None
+        return entry['payload'], max(0.0, time.time() - entry['fetched'])
+
+    # Function to replace some top-level fields of a cached payload, keeping its fetch time
+    def update(self, key, **fields):
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None:
+                return
+            entry['payload'] = {**entry['payload'], **fields}
+            write_json(self.path, entries)
+
+    def put(self, key, payload, fetched=None):
+        with self._lock:
+            entries = self._load()
+            entries[key] = {'fetched': fetched if fetched is not None else time.time(), 'payload': payload}
+            # Drop the oldest entries when locations change over time
+            if len(entries) > self.max_entries:
+                for old_key in sorted(entries, key=lambda k: entries[k]['fetched'])[:len(entries) - self.max_entries]:
+                    del entries[old_key]
+            write_json(self.path, entries)
+
+
+# Daily call budget for the OneCall API, persisted so restarts don't reset it
+class QuotaBudget:
+    def __init__(self, path, daily_limit=DEFAULT_DAILY_LIMIT, throttle_at=DEFAULT_THROTTLE_AT):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.throttle_at = throttle_at
+        self._state = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _today():
+        return time.strftime('%Y-%m-%d', time.gmtime())
+
+    @staticmethod
+    def seconds_until_reset():
+        now = time.time()
+        return 86400 - now % 86400
+
+    def _load(self):
+        if self._state is None:
+            self._state = read_json(self.path, {})
+        # Quota resets at midnight UTC
+        if self._state.get('day') != self._today():
+            self._state = {'day': self._today(), 'used': 0}
+        return self._state
+
+    def used(self):
+        with self._lock:
+            return self._load()['used']
+
+    def remaining(self):
+        return max(0, self.daily_limit - self.used())
+
+    # Function to claim one call; returns False once the daily quota is spent
+    def acquire(self):
+        with self._lock:
+            state = self._load()
+            if state['used'] >= self.daily_limit:
+                return False
+            state['used'] += 1
+            write_json(self.path, state)
+            return True
+
+    # Function to return the minimum seconds between refreshes at the current usage.
+    # Below the throttle point there is no limit; past it the remaining calls are spread
+    # evenly over the rest of the UTC day, and once exhausted we wait for the reset.
+    def min_interval(self):
+        used = self.used()
+        remaining = self.daily_limit - used
+        if remaining <= 0:
+            return self.seconds_until_reset()
+        if used < self.daily_limit * self.throttle_at:
+            return 0
+        return self.seconds_until_reset() / remaining
+
+
+# Last successful results the window can paint from at startup, before any network I/O.
+# Each section is stored with the time it was saved so the UI can show its age.
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        self._sections = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._sections is None:
+            self._sections = read_json(self.path, {})
+        return self._sections
+
+    # Returns (value, age in seconds) or (None, None)
+    def get(self, section):
+        with self._lock:
+            entry = self._load().get(section)
+        if entry is None:
+            return None, None
+        return entry['value'], max(0.0, time.time() - entry['saved'])
+
+    def put(self, section, value):
+        with self._lock:
+            sections = self._load()
+            sections[section] = {'saved': time.time(), 'value': value}
+            write_json(self.path, sections)
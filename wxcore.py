@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+
+# Fetch-and-parse core of smwPyWx, shared by the PyQt6 window and the headless CLI.
+# Holds the settings, caches and every network call. Nothing in here imports Qt or
+# shows a dialog: fetch functions raise FetchError, or return a Result via capture().
+
+import os
+import sys
+import json
+import time
+import configparser
+import wxhttp  # Shared pooled HTTP session
+import wxicons  # Two-tier weather icon cache
+import wxzip  # Offline ZIP code index (built from pgeocode)
+import wxcache  # OneCall response cache and quota budget
+import wxunits  # Local metric -> display unit conversion
+import wxschedule  # Per-source auto-refresh scheduling
+import wxsites  # Multi-location monitoring
+import wxhistory  # Local time-series history
+import wxsolar  # HamQSL solar data model and parser
+import wxmetrics  # Timing spans and counters for diagnostics
+import wxbroker  # Optional shared fetch broker for many instances on one host
+import wxtimeline  # Hourly and minutely forecast series
+import wxalerts  # Weather alert identity, diffing and notifications
+
+# Base API URLs (can be overridden from the [Endpoints] section of wxconfig.ini)
+BASEGEOURL = "http://api.openweathermap.org/geo/1.0/zip?"
+BASEOPENWEATHER = "https://api.openweathermap.org/data/3.0/onecall?"
+ICON_URL = "http://openweathermap.org/img/wn/"
+SOLAR_DATA_URL = "https://www.hamqsl.com/solarxml.php"
+
+# OneCall blocks we don't display; hourly and minutely are only fetched for the enabled views
+ONECALL_EXCLUDE = ""
+
+# Configuration file path
+CONFIG_FILE = 'wxconfig.ini'
+
+# Directory for on-disk caches (icons, ...)
+CACHE_DIR = 'wxcache'
+
+# Default Settings
+default_zip_code = "10001"
+default_units = "metric"  # Default to Celsius ("metric" for Celsius, "imperial" for Fahrenheit)
+default_api_key = ''
+
+# Initialize variables to hold settings
+zip_code = default_zip_code
+units = default_units
+API_KEY = default_api_key
+icon_prefetch = False  # Download the full icon set in the background on startup
+weather_refresh_interval = wxschedule.DEFAULT_WEATHER_INTERVAL  # seconds between OneCall refreshes
+solar_refresh_interval = wxschedule.DEFAULT_SOLAR_INTERVAL      # HamQSL publication cycle in seconds
+idle_prefetch_delay = wxschedule.DEFAULT_IDLE_PREFETCH_DELAY    # idle seconds before hidden tabs' data is fetched; 0 = never
+sites = []  # Extra monitored locations from [Locations], as wxsites.Site
+site_grid_degrees = wxsites.DEFAULT_GRID_DEGREES
+site_max_workers = wxsites.DEFAULT_MAX_WORKERS
+metrics_port = 0  # local port serving Prometheus-style metrics; 0 = off
+show_hourly = True    # Hourly tab, and fetch OneCall's hourly block for it
+show_minutely = True  # Next Hour tab, and fetch OneCall's minutely block for it
+alert_notify = True   # desktop notification for new or escalated alerts
+alert_poll_interval = wxalerts.DEFAULT_POLL_INTERVAL  # seconds between alerts-only polls; 0 = off
+
+# Raw icon PNGs on disk; decoded pixmaps are kept in memory by the GUI
+icon_disk_cache = wxicons.IconDiskCache(os.path.join(CACHE_DIR, 'icons'))
+
+# ZIP -> location lookups: local index first, then geo API results remembered on disk
+zip_index = wxzip.ZipIndex(os.path.join(CACHE_DIR, 'zipindex.bin'))
+geocode_cache = wxzip.GeocodeCache(os.path.join(CACHE_DIR, 'geocode.json'))
+
+# Last OneCall payloads (served while stale and revalidated) and the daily call budget
+onecall_cache = wxcache.ResponseCache(os.path.join(CACHE_DIR, 'onecall.json'))
+onecall_budget = wxcache.QuotaBudget(os.path.join(CACHE_DIR, 'quota.json'))
+
+# Last good location and solar data, painted at startup before the first refresh
+snapshot = wxcache.Snapshot(os.path.join(CACHE_DIR, 'snapshot.json'))
+
+# Every successful fetch is appended here for the Trends tab
+history = wxhistory.HistoryStore(os.path.join(CACHE_DIR, 'history.db'))
+
+# Paces OpenWeather API calls from all worker threads
+api_rate_limiter = wxhttp.RateLimiter(wxhttp.DEFAULT_API_CALLS_PER_MINUTE)
+
+# Shared fetch broker (wxbroker.BrokerClient) from the [Broker] section, or None to always fetch directly
+broker = None
+broker_address = None
+broker_shared = False  # the broker's Unix socket is usable by every user on the host
+
+# Function to point every endpoint at one server with the same paths as the real APIs,
+# e.g. the offline stand-in in benchmarks/stub_server.py
+def use_base_url(base):
+    global BASEGEOURL, BASEOPENWEATHER, ICON_URL, SOLAR_DATA_URL
+    base = base.rstrip('/')
+    BASEGEOURL = f"{base}/geo/1.0/zip?"
+    BASEOPENWEATHER = f"{base}/data/3.0/onecall?"
+    ICON_URL = f"{base}/img/wn/"
+    SOLAR_DATA_URL = f"{base}/solarxml.php"
+
+# Function to load settings from wxconfig.ini; returns False if the file doesn't exist yet
+def load_settings():
+    global zip_code, units, API_KEY, icon_prefetch, weather_refresh_interval, solar_refresh_interval, idle_prefetch_delay
+    global sites, site_grid_degrees, site_max_workers, metrics_port, broker, broker_address, broker_shared
+    global show_hourly, show_minutely, ONECALL_EXCLUDE, alert_notify, alert_poll_interval
+    config = configparser.ConfigParser()
+    config.optionxform = str  # Keep the case of site names in [Locations]
+
+    if os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+        if 'Settings' in config:
+            zip_code = config['Settings'].get('zip_code', default_zip_code)
+            units = config['Settings'].get('units', default_units)
+            API_KEY = config['Settings'].get('api_key', default_api_key)
+        # Optional endpoint overrides: base_url (all of them), geo_url, onecall_url, icon_url, solar_url
+        if 'Endpoints' in config:
+            load_endpoints(config['Endpoints'])
+        # Optional network tuning: connect_timeout, read_timeout, retries, backoff, api_calls_per_minute
+        if 'Network' in config:
+            network = config['Network']
+            wxhttp.configure(connect=network.get('connect_timeout'),
+                             read=network.get('read_timeout'),
+                             retry_count=network.get('retries'),
+                             retry_backoff=network.get('backoff'))
+            api_rate_limiter.per_minute = network.getfloat('api_calls_per_minute', wxhttp.DEFAULT_API_CALLS_PER_MINUTE)
+        # Optional cache tuning: icon_cache_kb, icon_prefetch, onecall_ttl_minutes
+        if 'Cache' in config:
+            cache = config['Cache']
+            icon_disk_cache.max_bytes = cache.getint('icon_cache_kb', wxicons.DEFAULT_DISK_BYTES // 1024) * 1024
+            icon_prefetch = cache.getboolean('icon_prefetch', False)
+            onecall_cache.ttl = cache.getfloat('onecall_ttl_minutes', wxcache.DEFAULT_TTL / 60) * 60
+        # Optional OneCall quota: onecall_daily_limit, throttle_at (fraction of the limit)
+        if 'Quota' in config:
+            quota = config['Quota']
+            onecall_budget.daily_limit = quota.getint('onecall_daily_limit', wxcache.DEFAULT_DAILY_LIMIT)
+            onecall_budget.throttle_at = quota.getfloat('throttle_at', wxcache.DEFAULT_THROTTLE_AT)
+        # Optional auto-refresh cadence: weather_minutes, solar_minutes, idle_prefetch_seconds
+        if 'Refresh' in config:
+            refresh = config['Refresh']
+            weather_refresh_interval = refresh.getfloat('weather_minutes', weather_refresh_interval / 60) * 60
+            solar_refresh_interval = refresh.getfloat('solar_minutes', solar_refresh_interval / 60) * 60
+            idle_prefetch_delay = refresh.getfloat('idle_prefetch_seconds', idle_prefetch_delay)
+        # Optional forecast views: hourly, minutely (each off saves fetching its OneCall block)
+        if 'Forecast' in config:
+            forecast = config['Forecast']
+            show_hourly = forecast.getboolean('hourly', True)
+            show_minutely = forecast.getboolean('minutely', True)
+            ONECALL_EXCLUDE = wxtimeline.onecall_exclude(show_hourly, show_minutely)
+        # Optional alert settings: notify, poll_minutes (alerts-only checks between full refreshes)
+        if 'Alerts' in config:
+            alert_settings = config['Alerts']
+            alert_notify = alert_settings.getboolean('notify', True)
+            alert_poll_interval = alert_settings.getfloat('poll_minutes', wxalerts.DEFAULT_POLL_INTERVAL / 60) * 60
+        # Optional extra sites to monitor ("name = zip") and how they are fetched
+        if 'Locations' in config:
+            sites = wxsites.parse_locations(config['Locations'])
+        if 'Monitor' in config:
+            monitor = config['Monitor']
+            site_grid_degrees = monitor.getfloat('grid_degrees', wxsites.DEFAULT_GRID_DEGREES)
+            site_max_workers = monitor.getint('max_workers', wxsites.DEFAULT_MAX_WORKERS)
+        # Room for every site on top of the main location, so site fetches never evict it
+        onecall_cache.max_entries = wxcache.DEFAULT_MAX_ENTRIES + len(sites)
+        # Optional history retention: enabled, raw_days, keep_days
+        if 'History' in config:
+            history_settings = config['History']
+            history.enabled = history_settings.getboolean('enabled', True)
+            history.raw_days = history_settings.getfloat('raw_days', wxhistory.DEFAULT_RAW_DAYS)
+            history.keep_days = history_settings.getfloat('keep_days', wxhistory.DEFAULT_KEEP_DAYS)
+        # Optional shared fetch broker: enabled, address (unix:/path or host:port), timeout, retry_seconds, shared
+        if 'Broker' in config:
+            broker_settings = config['Broker']
+            broker_address = broker_settings.get('address', wxbroker.DEFAULT_ADDRESS)
+            broker_shared = broker_settings.getboolean('shared', False)
+            if broker_settings.getboolean('enabled', True):
+                broker = wxbroker.BrokerClient(broker_address,
+                                               broker_settings.getfloat('timeout', wxbroker.DEFAULT_TIMEOUT),
+                                               broker_settings.getfloat('retry_seconds', wxbroker.DEFAULT_RETRY_SECONDS))
+        # Optional instrumentation: enabled, log, log_file, log_max_kb, prometheus_port
+        if 'Diagnostics' in config:
+            diagnostics = config['Diagnostics']
+            wxmetrics.enabled = diagnostics.getboolean('enabled', True)
+            if wxmetrics.enabled and diagnostics.getboolean('log', False):
+                wxmetrics.open_log(diagnostics.get('log_file', os.path.join(CACHE_DIR, 'metrics.jsonl')),
+                                   diagnostics.getint('log_max_kb', wxmetrics.DEFAULT_LOG_MAX_BYTES // 1024) * 1024)
+            metrics_port = diagnostics.getint('prometheus_port', 0) if wxmetrics.enabled else 0
+        return True
+    return False
+
+# Function to apply an [Endpoints] section; a specific URL wins over base_url
+def load_endpoints(endpoints):
+    global BASEGEOURL, BASEOPENWEATHER, ICON_URL, SOLAR_DATA_URL
+    if 'base_url' in endpoints:
+        use_base_url(endpoints['base_url'])
+    BASEGEOURL = endpoints.get('geo_url', BASEGEOURL)
+    BASEOPENWEATHER = endpoints.get('onecall_url', BASEOPENWEATHER)
+    ICON_URL = endpoints.get('icon_url', ICON_URL)
+    SOLAR_DATA_URL = endpoints.get('solar_url', SOLAR_DATA_URL)
+
+# Function to save settings to wxconfig.ini
+def save_settings():
+    config = configparser.ConfigParser()
+    config.optionxform = str
+    # Keep any other sections (e.g. [Network]) that are already in the file
+    config.read(CONFIG_FILE)
+    config['Settings'] = {
+        'zip_code': zip_code,
+        'units': units,
+        'api_key': API_KEY
+    }
+
+    with open(CONFIG_FILE, 'w') as configfile:
+        config.write(configfile)
+
+# Raised by the fetch functions with a message fit to show the user
+class FetchError(Exception):
+    pass
+
+# Outcome of one fetch: either a value or an error message, never an exception
+class Result:
+    __slots__ = ('value', 'error')
+
+    def __init__(self, value=None, error=None):
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+# Function to run a fetch function and capture any failure as a Result
+def capture(fn, *args, what="data"):
+    try:
+        return Result(fn(*args))
+    except FetchError as e:
+        wxmetrics.count("fetch.errors")
+        return Result(error=str(e))
+    except Exception as e:  # Network errors, bad JSON, ...
+        wxmetrics.count("fetch.errors")
+        return Result(error=f"Error fetching {what}: {e}")
+
+# Function to fetch a path from the shared broker. Returns None when no broker is configured
+# or it can't be reached, so the caller fetches directly; an upstream failure the broker
+# reports is raised as a FetchError rather than retried here.
+def from_broker(path, **params):
+    if broker is None:
+        return None
+    try:
+        with wxmetrics.span(f"broker{path.replace('/', '.')}"):
+            return broker.get(path, **params)
+    except wxbroker.BrokerUnavailable as e:
+        wxmetrics.count("broker.unavailable")
+        print(f"Error: {e}; fetching directly", file=sys.stderr)
+        return None
+    except wxbroker.BrokerError as e:
+        raise FetchError(str(e))
+
+# Function to geocode location using zip code
+def geocode_location(zip_code):
+    url = f"{BASEGEOURL}zip={zip_code},US&appid={API_KEY}"
+    api_rate_limiter.acquire()
+    response = wxhttp.get(url, label="geo")
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise FetchError("Failed to get geocode data.")
+
+# Function to build the response cache key for the current OneCall settings
+def onecall_key(lat, lon, exclude=None):
+    return wxcache.ResponseCache.key(lat, lon, wxunits.CANONICAL_UNITS, ONECALL_EXCLUDE if exclude is None else exclude)
+
+# Function to get weather data using OpenWeather API 3.0; every call counts against the daily budget.
+# Always fetched in canonical (metric) units; display units are applied locally by wxunits.
+# exclude defaults to ONECALL_EXCLUDE. With a broker, its cache and budget decide whether OneCall is actually called.
+# Returns (OneCall data, age in seconds): 0 from the API, or how long the broker has had it.
+def get_weather(lat, lon, exclude=None):
+    exclude = ONECALL_EXCLUDE if exclude is None else exclude
+    reply = from_broker('/onecall', lat=lat, lon=lon, exclude=exclude)
+    if reply is not None:
+        reply = json.loads(reply)
+        weather_data = reply['payload']
+        onecall_cache.put(onecall_key(lat, lon, exclude), weather_data, fetched=time.time() - reply['age'])
+        record_history(history.record_weather, history_location(lat, lon), weather_data.get('current', {}))
+        return weather_data, reply['age']
+
+    if not onecall_budget.acquire():
+        wxmetrics.count("api.onecall.quota_exhausted")
+        raise FetchError("Daily OneCall quota reached; showing cached weather data.")
+    url = f"{BASEOPENWEATHER}lat={lat}&lon={lon}&units={wxunits.CANONICAL_UNITS}&exclude={exclude}&appid={API_KEY}"
+    api_rate_limiter.acquire()
+    response = wxhttp.get(url, conditional=False, label="onecall")
+    if response.status_code == 200:
+        weather_data = wxtimeline.compact(response.json())
+        onecall_cache.put(onecall_key(lat, lon, exclude), weather_data)
+        record_history(history.record_weather, history_location(lat, lon), weather_data.get('current', {}))
+        return weather_data, 0
+    else:
+        raise FetchError("Failed to get weather data.")
+
+# Function to fetch only the alerts for a location. The response is tiny, but it is still a
+# OneCall call and counts against the daily budget like any other.
+# The cached full payload gets the new alerts too, so re-showing it doesn't bring back older ones.
+def get_alerts(lat, lon):
+    weather_data, _ = get_weather(lat, lon, exclude=wxalerts.ALERTS_ONLY_EXCLUDE)
+    alerts = weather_data.get('alerts', [])
+    onecall_cache.update(onecall_key(lat, lon), alerts=alerts)
+    return alerts
+
+# Function to build the history location key for coordinates
+def history_location(lat, lon):
+    return f"{float(lat):.4f},{float(lon):.4f}"
+
+# Function to write to the history store; a history problem must never fail a fetch
+def record_history(fn, *args):
+    try:
+        fn(*args)
+    except Exception as e:  # sqlite3.Error, disk full, ...
+        print(f"Error: failed to record history: {e}", file=sys.stderr)
+
+# Function to read one Trends chart from the history on a worker thread: the window ending now,
+# downsampled to buckets points. Returns (points, start, end); no points if the history can't be read
+def get_trend(series, location, window, buckets):
+    end = int(time.time())
+    start = end - window
+    try:
+        points = history.query(series, location, start, end, buckets=buckets)
+    except Exception as e:  # sqlite3.Error; an unreadable history shouldn't break the window
+        print(f"Error: failed to read history: {e}", file=sys.stderr)
+        points = []
+    return points, start, end
+
+# Function to return how long cached OneCall data is used: the cache TTL, or longer if the call budget is tight
+def onecall_max_age():
+    return max(onecall_cache.ttl, onecall_budget.min_interval())
+
+# Function to return (OneCall data, age) from the cache while it is fresh, fetching otherwise
+def get_weather_cached(lat, lon, exclude=None):
+    weather_data, age = onecall_cache.get(onecall_key(lat, lon, exclude))
+    if weather_data is not None and age < onecall_max_age():
+        wxmetrics.count("cache.onecall.hit")
+        return weather_data, age
+    wxmetrics.count("cache.onecall.miss")
+    return get_weather(lat, lon, exclude)
+
+# Function to fetch and parse solar weather data, once, on the calling (worker) thread.
+# Returns (XML bytes, wxsolar.SolarData); the bytes are kept for the startup snapshot.
+def get_solar_weather():
+    content = from_broker('/solar')
+    if content is not None:
+        solar = parse_solar(content)
+        record_history(history.record_solar, solar)
+        return content, solar
+
+    response = wxhttp.get(SOLAR_DATA_URL, label="hamqsl")
+    if response.status_code == 200:
+        solar = parse_solar(response.content)
+        if not response.not_modified:
+            record_history(history.record_solar, solar)
+        return response.content, solar
+    else:
+        raise FetchError("Failed to get solar weather data.")
+
+# Function to parse the HamQSL XML into a wxsolar.SolarData
+def parse_solar(solar_data):
+    try:
+        with wxmetrics.span("parse.solar"):
+            return wxsolar.parse(solar_data)
+    except wxsolar.SolarParseError as e:
+        raise FetchError(f"Failed to parse solar weather data: {e}")
+
+# Function to resolve a zip code to coordinates and a display name.
+# Uses the local ZIP index; only unknown ZIPs cost a geo API call, and those are cached.
+def resolve_location(zip_code):
+    try:
+        location = zip_index.lookup(zip_code)
+    except (ImportError, OSError, ValueError) as e:  # pgeocode or its dataset unavailable
+        print(f"Error: ZIP index unavailable: {e}", file=sys.stderr)
+        location = None
+    if location is not None:
+        wxmetrics.count("cache.zip_index.hit")
+        return location
+    location = geocode_cache.get(zip_code)
+    if location is not None:
+        wxmetrics.count("cache.geocode.hit")
+        return location
+
+    wxmetrics.count("cache.geocode.miss")
+    reply = from_broker('/geo', zip=zip_code)
+    if reply is not None:
+        location = json.loads(reply)
+    else:
+        geocode_data = geocode_location(zip_code)
+        location = {
+            'city': geocode_data.get('name'),
+            'lat': geocode_data.get('lat'),
+            'lon': geocode_data.get('lon'),
+            'country': geocode_data.get('country'),
+            'state_code': "",
+            'state_name': "",
+        }
+    geocode_cache.put(zip_code, location)
+    return location
+
+# Function to fetch OneCall data for one grid cell of the Sites overview.
+# Returns (cell, data, age, error) so a failed cell only marks its own rows.
+def get_site_weather(cell):
+    try:
+        return (cell, *get_weather(*cell, exclude=wxsites.ONECALL_EXCLUDE), None)
+    except FetchError as e:
+        error = str(e)
+    except Exception as e:  # Network errors, bad JSON, ...
+        error = f"Error fetching weather data: {e}"
+    wxmetrics.count("fetch.errors")
+    return cell, None, None, error
+
+# Function to resolve the ZIP of every monitored site
+def resolve_site_locations(site_list):
+    return wxsites.resolve_sites(site_list, resolve_location)
+
+def icon_from_broker(icon):
+    return from_broker('/icon', code=icon)
+
+# Function to load raw icon bytes from the disk cache, the broker or the network
+def get_icon_data(icon):
+    data = icon_disk_cache.load(ICON_URL, icon, icon_from_broker if broker is not None else None)
+    if data is None:
+        raise FetchError(f"Failed to get weather icon {icon}.")
+    return data
+
+# Function to fill the disk cache with every icon code
+def prefetch_weather_icons():
+    return icon_disk_cache.prefetch(ICON_URL)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+# Headless entry point for smwPyWx (run as: python smwPyWx.py --headless ...).
+# Fetches current conditions, forecast, alerts and solar data for one or more ZIP codes
+# and writes them as JSON or CSV, for cron jobs and monitoring pipelines. Uses the same
+# settings, caches and quota budget as the window, and never imports Qt.
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+import wxcore
+import wxsites
+import wxsolar
+import wxunits
+
+SECTIONS = ("current", "forecast", "alerts", "solar")
+
+# The report has no hourly or minutely section, so those OneCall blocks are never fetched
+ONECALL_EXCLUDE = "minutely,hourly"
+
+
+# Function to format a UNIX timestamp as local ISO 8601, or None
+def iso_time(timestamp):
+    if not timestamp:
+        return None
+    return time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(timestamp))
+
+
+def current_record(current):
+    weather = current.get('weather', [{}])[0]
+    return {
+        'time': iso_time(current.get('dt')),
+        'temp': current.get('temp'),
+        'feels_like': current.get('feels_like'),
+        'humidity': current.get('humidity'),
+        'pressure': current.get('pressure'),
+        'dew_point': current.get('dew_point'),
+        'clouds': current.get('clouds'),
+        'visibility': current.get('visibility'),
+        'wind_speed': current.get('wind_speed'),
+        'wind_gust': current.get('wind_gust'),
+        'wind_deg': current.get('wind_deg'),
+        'description': weather.get('description'),
+        'icon': weather.get('icon'),
+        'sunrise': iso_time(current.get('sunrise')),
+        'sunset': iso_time(current.get('sunset')),
+    }
+
+
+def forecast_records(daily):
+    records = []
+    for day in daily:
+        weather = day.get('weather', [{}])[0]
+        records.append({
+            'date': time.strftime('%Y-%m-%d', time.localtime(day.get('dt', 0))),
+            'temp_min': day.get('temp', {}).get('min'),
+            'temp_max': day.get('temp', {}).get('max'),
+            'pop': day.get('pop'),
+            'humidity': day.get('humidity'),
+            'wind_speed': day.get('wind_speed'),
+            'description': weather.get('description'),
+            'icon': weather.get('icon'),
+        })
+    return records
+
+
+def alert_records(alerts):
+    return [{
+        'sender': alert.get('sender_name'),
+        'event': alert.get('event'),
+        'start': iso_time(alert.get('start')),
+        'end': iso_time(alert.get('end')),
+        'description': alert.get('description'),
+    } for alert in alerts]
+
+
+def fetch_solar():
+    _, solar = wxcore.get_solar_weather()
+    return wxsolar.to_record(solar)
+
+
+# Function to fetch every requested section for a batch of ZIP codes.
+# Errors are recorded per ZIP (or for solar) instead of aborting the run.
+def collect(zip_codes, sections):
+    report = {
+        'generated': iso_time(time.time()),
+        'units': wxcore.units,
+        'locations': [],
+    }
+
+    if 'solar' in sections:
+        result = wxcore.capture(fetch_solar, what="solar data")
+        report['solar'] = result.value if result.ok else {'error': result.error}
+
+    if not set(sections) & {'current', 'forecast', 'alerts'}:
+        return report
+
+    # ZIPs in the same grid cell share one OneCall request, as in the Sites tab
+    site_list = wxsites.resolve_sites([wxsites.Site(z, z) for z in zip_codes], wxcore.resolve_location)
+    cell_results = {cell: wxcore.capture(wxcore.get_weather_cached, *cell, ONECALL_EXCLUDE, what="weather data")
+                    for cell in wxsites.group_by_cell(site_list, wxcore.site_grid_degrees)}
+
+    for site in site_list:
+        entry = {'zip': site.zip_code, 'location': site.location, 'error': site.error}
+        report['locations'].append(entry)
+        if site.location is None:
+            continue
+        result = cell_results[wxsites.grid_cell(site.location['lat'], site.location['lon'], wxcore.site_grid_degrees)]
+        if not result.ok:
+            entry['error'] = result.error
+            continue
+        weather_data, age = result.value
+        weather_data = wxunits.convert_onecall(weather_data, wxcore.units)
+        entry['age_seconds'] = round(age)
+        if 'current' in sections:
+            entry['current'] = current_record(weather_data['current'])
+        if 'forecast' in sections:
+            entry['forecast'] = forecast_records(weather_data.get('daily', []))
+        if 'alerts' in sections:
+            entry['alerts'] = alert_records(weather_data.get('alerts', []))
+    return report
+
+
+# Function to return the report's rows for one section, each tagged with its ZIP
+def section_rows(report, section):
+    if section == 'solar':
+        solar = report.get('solar', {})
+        return [solar] if solar else []
+    rows = []
+    for entry in report['locations']:
+        location = entry['location'] or {}
+        prefix = {'zip': entry['zip'], 'city': location.get('city'), 'state': location.get('state_code'),
+                  'error': entry['error']}
+        records = entry.get(section)
+        if records is None:
+            rows.append(prefix)
+        elif isinstance(records, dict):
+            rows.append({**prefix, **records})
+        else:
+            rows.extend({**prefix, **record} for record in records)
+    return rows
+
+
+def write_csv(rows, out):
+    columns = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def has_errors(report):
+    return any(entry['error'] for entry in report['locations']) or 'error' in report.get('solar', {})
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="smwPyWx.py --headless",
+                                     description="Fetch weather and solar data without the GUI.")
+    parser.add_argument('--zip', dest='zip_codes', action='append', metavar='ZIP',
+                        help="ZIP code to report on; repeat for a batch (default: zip_code from wxconfig.ini)")
+    parser.add_argument('--sections', default=",".join(SECTIONS),
+                        help=f"comma-separated sections to include: {', '.join(SECTIONS)}")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--output', '-o', help="write to this file instead of stdout")
+    parser.add_argument('--units', choices=('metric', 'imperial'), help="override the configured units")
+    parser.add_argument('--api-key', help="override the configured OpenWeather API key")
+    parser.add_argument('--config', help=f"settings file (default: {wxcore.CONFIG_FILE})")
+    args = parser.parse_args(argv)
+
+    args.sections = [s.strip() for s in args.sections.split(",") if s.strip()]
+    unknown = set(args.sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown section(s): {', '.join(sorted(unknown))}")
+    if args.format == 'csv' and len(args.sections) != 1:
+        parser.error("CSV output holds one table; pick a single section with --sections")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.config:
+        wxcore.CONFIG_FILE = args.config
+    wxcore.load_settings()
+    if args.units:
+        wxcore.units = args.units
+    if args.api_key:
+        wxcore.API_KEY = args.api_key
+
+    report = collect(args.zip_codes or [wxcore.zip_code], args.sections)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(report, out, indent=2)
+            out.write("\n")
+        else:
+            write_csv(section_rows(report, args.sections[0]), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    return 1 if has_errors(report) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
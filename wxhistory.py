@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Local time-series history for smwPyWx.
+# Every successful OneCall and HamQSL fetch appends one row to a SQLite database,
+# keyed by (location, timestamp) so re-reading cached data never duplicates rows.
+# Old rows are compacted to hourly averages and eventually dropped. Trend queries
+# downsample in SQL to min/max per bucket, so a year of data comes back as a few
+# hundred points.
+
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_RAW_DAYS = 30     # keep full resolution this long
+DEFAULT_KEEP_DAYS = 365   # drop anything older
+COMPACT_EVERY = 24 * 60 * 60
+
+# Series available for trends: name -> (table, column)
+SERIES = {
+    'kindex': ('solar', 'kindex'),
+    'solarflux': ('solar', 'solarflux'),
+    'aindex': ('solar', 'aindex'),
+    'sunspots': ('solar', 'sunspots'),
+    'temp': ('weather', 'temp'),
+    'pressure': ('weather', 'pressure'),
+    'humidity': ('weather', 'humidity'),
+    'wind_speed': ('weather', 'wind_speed'),
+}
+
+WEATHER_COLUMNS = ('temp', 'pressure', 'humidity', 'wind_speed')
+SOLAR_COLUMNS = ('solarflux', 'aindex', 'kindex', 'sunspots')
+
+# Solar rows use a fixed location key; the indices are global
+SOLAR_LOCATION = 'hamqsl'
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS weather (
+    location TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    {', '.join(f'{c} REAL' for c in WEATHER_COLUMNS)},
+    PRIMARY KEY (location, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS solar (
+    location TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    {', '.join(f'{c} REAL' for c in SOLAR_COLUMNS)},
+    PRIMARY KEY (location, ts)
+) WITHOUT ROWID;
+"""
+
+
+# Function to turn a text or numeric value into a float, or None
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    def __init__(self, path, raw_days=DEFAULT_RAW_DAYS, keep_days=DEFAULT_KEEP_DAYS):
+        self.path = path
+        self.raw_days = raw_days
+        self.keep_days = keep_days
+        self.enabled = True
+        self._db = None
+        self._last_compact = 0.0
+        self._lock = threading.Lock()  # one connection shared by worker threads
+
+    def _connect(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _insert(self, table, columns, location, ts, values):
+        if not self.enabled or ts is None:
+            return
+        with self._lock:
+            db = self._connect()
+            db.execute(f"INSERT OR IGNORE INTO {table} (location, ts, {', '.join(columns)}) "
+                       f"VALUES (?, ?, {', '.join('?' * len(columns))})",
+                       (location, int(ts), *values))
+            db.commit()
+            if time.time() - self._last_compact > COMPACT_EVERY:
+                self._compact_locked()
+
+    # Function to record the current block of a OneCall payload (metric units)
+    def record_weather(self, location, current):
+        self._insert('weather', WEATHER_COLUMNS, location, current.get('dt'),
+                     [to_float(current.get(c)) for c in WEATHER_COLUMNS])
+
+    # Function to record a parsed wxsolar.SolarData at its publication time
+    def record_solar(self, solar):
+        self._insert('solar', SOLAR_COLUMNS, SOLAR_LOCATION, solar.updated,
+                     [to_float(getattr(solar, c)) for c in SOLAR_COLUMNS])
+
+    # Function to apply the retention policy: hourly averages past raw_days, nothing past keep_days
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        db = self._connect()
+        now = time.time()
+        raw_cutoff = int(now - self.raw_days * 86400)
+        keep_cutoff = int(now - self.keep_days * 86400)
+        with db:
+            for table, columns in (('weather', WEATHER_COLUMNS), ('solar', SOLAR_COLUMNS)):
+                db.execute(f"DELETE FROM {table} WHERE ts < ?", (keep_cutoff,))
+                averages = ', '.join(f'AVG({c})' for c in columns)
+                rows = db.execute(f"SELECT location, (ts / 3600) * 3600, {averages} FROM {table} "
+                                  f"WHERE ts < ? GROUP BY location, ts / 3600", (raw_cutoff,)).fetchall()
+                db.execute(f"DELETE FROM {table} WHERE ts < ?", (raw_cutoff,))
+                db.executemany(f"INSERT INTO {table} (location, ts, {', '.join(columns)}) "
+                               f"VALUES (?, ?, {', '.join('?' * len(columns))})", rows)
+        self._last_compact = now
+
+    # Function to return [(bucket start, min, max)] for a series over [start, end),
+    # downsampled in SQL to at most `buckets` points
+    def query(self, series, location, start, end, buckets=300):
+        table, column = SERIES[series]
+        if table == 'solar':
+            location = SOLAR_LOCATION
+        width = max(1, (end - start) // buckets)
+        with self._lock:
+            return self._connect().execute(
+                f"SELECT ? + ((ts - ?) / ?) * ?, MIN({column}), MAX({column}) FROM {table} "
+                f"WHERE location = ? AND ts >= ? AND ts < ? AND {column} IS NOT NULL "
+                f"GROUP BY (ts - ?) / ? ORDER BY 1",
+                (int(start), int(start), int(width), int(width), location, int(start), int(end),
+                 int(start), int(width))).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+# Shared HTTP layer for smwPyWx.
+# Every fetch goes through one pooled requests.Session so connections to OpenWeather,
+# HamQSL and the icon host are kept alive and reused. Requests have a timeout, retry
+# with exponential backoff, and are revalidated with ETag / If-Modified-Since so an
+# unchanged resource costs a 304 instead of a full body.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import wxmetrics
+
+# requests/urllib3 take longer to import than the rest of the app together, so they
+# are imported on first use (on a worker thread) rather than at startup.
+
+# Default network settings (can be overridden from the [Network] section of wxconfig.ini)
+DEFAULT_CONNECT_TIMEOUT = 5.0   # seconds
+DEFAULT_READ_TIMEOUT = 15.0     # seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5           # seconds; doubles on every retry
+POOL_MAXSIZE = 8                # connections kept per host
+MAX_VALIDATORS = 128            # cached bodies kept for conditional GETs
+DEFAULT_API_CALLS_PER_MINUTE = 60  # OpenWeather's per-minute limit for API keys
+
+# HTTP statuses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+connect_timeout = DEFAULT_CONNECT_TIMEOUT
+read_timeout = DEFAULT_READ_TIMEOUT
+retries = DEFAULT_RETRIES
+backoff = DEFAULT_BACKOFF
+
+_session = None
+_session_lock = threading.Lock()
+
+# url -> (etag, last_modified, content), most recently used last
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+# Minimal response object; mirrors the parts of requests.Response the app uses
+class HTTPResponse:
+    __slots__ = ('status_code', 'content', 'not_modified')
+
+    def __init__(self, status_code, content, not_modified=False):
+        self.status_code = status_code
+        self.content = content
+        self.not_modified = not_modified  # True when served from a 304 revalidation
+
+    def json(self):
+        return json.loads(self.content)
+
+
+# Function to change timeouts and retry policy; the session is rebuilt on next use
+def configure(connect=None, read=None, retry_count=None, retry_backoff=None):
+    global connect_timeout, read_timeout, retries, backoff, _session
+    if connect is not None:
+        connect_timeout = float(connect)
+    if read is not None:
+        read_timeout = float(read)
+    if retry_count is not None:
+        retries = int(retry_count)
+    if retry_backoff is not None:
+        backoff = float(retry_backoff)
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+# Function to build the shared session with a pooled, retrying adapter
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.headers['User-Agent'] = 'smwPyWx'
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+# Function to return the process-wide session, creating it on first use
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+
+# Function to GET a URL through the shared session.
+# With conditional=True the last ETag / Last-Modified seen for the URL is sent, and a
+# 304 answer is returned as a 200 carrying the previously downloaded body.
+# label names the endpoint in the metrics (http.<label> span and counters).
+def get(url, conditional=True, label="other"):
+    with wxmetrics.span(f"http.{label}"):
+        response = _get(url, conditional)
+    wxmetrics.count(f"http.{label}.requests")
+    if response.not_modified:
+        wxmetrics.count(f"http.{label}.not_modified")
+    elif response.status_code >= 400:
+        wxmetrics.count(f"http.{label}.errors")
+    else:
+        wxmetrics.count(f"http.{label}.bytes", len(response.content))
+    return response
+
+
+def _get(url, conditional):
+    headers = {}
+    cached = None
+    if conditional:
+        with _validators_lock:
+            cached = _validators.get(url)
+            if cached is not None:
+                _validators.move_to_end(url)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+    response = get_session().get(url, headers=headers, timeout=(connect_timeout, read_timeout))
+    # Time to response headers: DNS, connect/TLS (on a new connection) and server time
+    wxmetrics.observe("http.ttfb", response.elapsed.total_seconds())
+
+    if response.status_code == 304 and cached is not None:
+        return HTTPResponse(200, cached[2], not_modified=True)
+
+    if conditional and response.status_code == 200:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with _validators_lock:
+                _validators[url] = (etag, last_modified, response.content)
+                _validators.move_to_end(url)
+                while len(_validators) > MAX_VALIDATORS:
+                    _validators.popitem(last=False)
+
+    return HTTPResponse(response.status_code, response.content)
+
+
+# Global token-bucket limit on API calls across worker threads:
+# up to burst calls at once, refilled at per_minute calls per minute
+class RateLimiter:
+    def __init__(self, per_minute, burst=10):
+        self.per_minute = per_minute
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Function to block the calling (worker) thread until a call may be made
+    def acquire(self):
+        if self.per_minute <= 0:
+            return
+        rate = self.per_minute / 60.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            # Take the token now (possibly going negative) so waiting threads queue up in order
+            self._tokens -= 1
+            wait = -self._tokens / rate if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
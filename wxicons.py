@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+# Weather icon cache for smwPyWx.
+# Two tiers: a small in-memory LRU of decoded images (filled by the GUI) and an
+# on-disk store of the raw PNGs with size-based eviction. OpenWeather only has
+# 18 icon codes, so a warm cache needs no icon network traffic at all.
+
+import os
+import threading
+from collections import OrderedDict
+
+import wxhttp
+import wxmetrics
+
+# Every icon code OpenWeather uses (day and night variants)
+ICON_CODES = [f"{code}{tod}" for code in ("01", "02", "03", "04", "09", "10", "11", "13", "50")
+              for tod in ("d", "n")]
+
+DEFAULT_MEMORY_ICONS = 32
+DEFAULT_DISK_BYTES = 2 * 1024 * 1024
+
+
+# Function to build the download URL for an icon code
+def icon_url(base_url, icon):
+    return f"{base_url}{icon}@2x.png"
+
+
+# Bounded least-recently-used mapping; used for decoded QPixmaps keyed by icon code
+class LRUCache:
+    def __init__(self, maxsize=DEFAULT_MEMORY_ICONS):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Persistent store of icon PNGs; least recently used files are evicted past max_bytes
+class IconDiskCache:
+    def __init__(self, directory, max_bytes=DEFAULT_DISK_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, icon):
+        # Icon codes are short alphanumerics; refuse anything that could escape the directory
+        if not icon.isalnum():
+            raise ValueError(f"Invalid icon code: {icon!r}")
+        return os.path.join(self.directory, f"{icon}@2x.png")
+
+    def get(self, icon):
+        path = self._path(icon)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, icon, data):
+        path = self._path(icon)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith('.png')]
+            except OSError:
+                return
+            stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+            total = sum(size for _, size, _ in stats)
+            for _, size, path in sorted(stats):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    # Function to return icon bytes from disk, else from shared(icon) if given, else the
+    # network; whatever is fetched is stored on disk
+    def load(self, base_url, icon, shared=None):
+        data = self.get(icon)
+        if data is not None:
+            wxmetrics.count("cache.icon_disk.hit")
+            return data
+        wxmetrics.count("cache.icon_disk.miss")
+        data = shared(icon) if shared is not None else None
+        if data is not None:
+            self.put(icon, data)
+            return data
+        response = wxhttp.get(icon_url(base_url, icon), label="icon")
+        if response.status_code != 200:
+            return None
+        self.put(icon, response.content)
+        return response.content
+
+    # Function to download every known icon that is not on disk yet
+    def prefetch(self, base_url):
+        fetched = 0
+        for icon in ICON_CODES:
+            if self.get(icon) is None and self.load(base_url, icon) is not None:
+                fetched += 1
+        return fetched
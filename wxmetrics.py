@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+# Hot-path instrumentation for smwPyWx.
+# Timing spans around each refresh stage and counters for API calls, cache hits and
+# misses, bytes transferred and errors. Kept in memory for the Help -> Diagnostics
+# panel, optionally appended to a rolling JSON-lines log, and optionally served as
+# Prometheus text on a local port. With enabled = False, span() hands back a shared
+# no-op object and count() returns at once, so instrumented code costs almost nothing.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+RECENT_SAMPLES = 200            # durations kept per span for percentiles
+DEFAULT_LOG_MAX_BYTES = 1024 * 1024
+
+enabled = True
+_log = None
+_server = None
+
+_lock = threading.Lock()
+_spans = {}     # name -> SpanStats
+_counters = {}  # name -> int
+_started = time.time()
+
+
+class SpanStats:
+    __slots__ = ('count', 'total', 'max', 'last', 'recent')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+        self.recent.append(seconds)
+
+    # Function to return the q-th percentile (0-1) of the recent durations
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Span:
+    __slots__ = ('name', 'fields', 'start')
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fields = self.fields if exc_type is None else {**self.fields, 'error': True}
+        observe(self.name, time.perf_counter() - self.start, **fields)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+# Function to time a block: with wxmetrics.span("parse.solar"): ...
+def span(name, **fields):
+    if not enabled:
+        return _NULL_SPAN
+    return _Span(name, fields)
+
+
+# Function to record a duration measured elsewhere (e.g. across worker threads)
+def observe(name, seconds, **fields):
+    if not enabled:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = SpanStats()
+        stats.add(seconds)
+    if fields.get('error'):
+        count(f"{name}.errors")
+    if _log is not None:
+        _log.write({'ts': round(time.time(), 3), 'span': name, 'ms': round(seconds * 1000, 3), **fields})
+
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def reset():
+    global _started
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+# Function to return a copy of everything recorded, for the diagnostics panel
+def snapshot():
+    with _lock:
+        spans = {name: {'count': s.count, 'total': s.total, 'mean': s.total / s.count if s.count else 0.0,
+                        'last': s.last, 'p50': s.percentile(0.5), 'p95': s.percentile(0.95), 'max': s.max}
+                 for name, s in _spans.items()}
+        return {'since': _started, 'spans': spans, 'counters': dict(_counters)}
+
+
+# Rolling JSON-lines log: one object per finished span, rotated to <path>.1 when full
+class JsonLinesLog:
+    def __init__(self, path, max_bytes=DEFAULT_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file = None
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self._file = open(self.path, 'a', encoding='utf-8')
+                self._file.write(line)
+                self._file.flush()
+                if self._file.tell() > self.max_bytes:
+                    self._file.close()
+                    os.replace(self.path, f"{self.path}.1")
+                    self._file = None
+            except OSError:
+                pass  # diagnostics must never break a fetch
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def open_log(path, max_bytes=DEFAULT_LOG_MAX_BYTES):
+    global _log
+    close_log()
+    _log = JsonLinesLog(path, max_bytes)
+
+
+def close_log():
+    global _log
+    if _log is not None:
+        _log.close()
+        _log = None
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+# Function to render the metrics in the Prometheus text exposition format
+def prometheus_text():
+    data = snapshot()
+    lines = ["# HELP smwpywx_span_seconds Time spent in each instrumented stage.",
+             "# TYPE smwpywx_span_seconds summary"]
+    for name, s in sorted(data['spans'].items()):
+        label = _label(name)
+        lines.append(f'smwpywx_span_seconds{{span="{label}",quantile="0.5"}} {s["p50"]:.6f}')
+        lines.append(f'smwpywx_span_seconds{{span="{label}",quantile="0.95"}} {s["p95"]:.6f}')
+        lines.append(f'smwpywx_span_seconds_sum{{span="{label}"}} {s["total"]:.6f}')
+        lines.append(f'smwpywx_span_seconds_count{{span="{label}"}} {s["count"]}')
+    lines += ["# HELP smwpywx_events_total API calls, cache hits and misses, bytes and errors.",
+              "# TYPE smwpywx_events_total counter"]
+    for name, value in sorted(data['counters'].items()):
+        lines.append(f'smwpywx_events_total{{name="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+# Function to serve /metrics on a local port from a background thread
+def serve(port, host='127.0.0.1'):
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    stop_server()
+    _server = ThreadingHTTPServer((host, port), MetricsHandler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server.server_address[1]
+
+
+def stop_server():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# Auto-refresh scheduling for smwPyWx.
+# Each data source keeps its own next-due time. The app asks which sources are due,
+# marks them in flight (so overlapping triggers coalesce), and reports success with
+# the time new data can next be expected, or failure, which backs off exponentially.
+# Sources only shown on hidden tabs are inactive: they keep their schedule but don't
+# wake the timer, and are fetched when their tab opens or the app is idle.
+# No Qt here; the window drives this with a single QTimer.
+
+import time
+
+DEFAULT_WEATHER_INTERVAL = 10 * 60      # OneCall current conditions update about every 10 minutes
+DEFAULT_SOLAR_INTERVAL = 3 * 60 * 60    # HamQSL publishes roughly every 3 hours
+SOLAR_LATE_RETRY = 15 * 60              # poll interval once a HamQSL update is overdue
+BACKOFF_BASE = 30                       # first retry delay after an error, in seconds
+BACKOFF_MAX = 60 * 60                   # longest retry delay
+DEFAULT_IDLE_PREFETCH_DELAY = 120       # idle seconds before inactive sources are fetched
+
+
+# Function to compute when the next HamQSL update can be expected
+def next_solar_due(updated, now=None, interval=DEFAULT_SOLAR_INTERVAL):
+    now = time.time() if now is None else now
+    if updated is None:
+        return now + SOLAR_LATE_RETRY
+    expected = updated + interval
+    # The feed is late; check again soon rather than waiting another full cycle
+    return expected if expected > now else now + SOLAR_LATE_RETRY
+
+
+# Function to compute when a refetch of OneCall can return newer data.
+# fetched is when the payload was downloaded, data_dt is its current.dt timestamp.
+def next_weather_due(fetched, data_dt, max_age, interval=DEFAULT_WEATHER_INTERVAL):
+    due = fetched + max_age
+    if data_dt:
+        due = max(due, data_dt + interval)
+    return due
+
+
+# Per-source refresh state
+class SourceState:
+    __slots__ = ('next_due', 'in_flight', 'failures', 'active')
+
+    def __init__(self):
+        self.next_due = 0.0
+        self.in_flight = False
+        self.failures = 0
+        self.active = True
+
+
+class RefreshScheduler:
+    def __init__(self, sources):
+        self.sources = {source: SourceState() for source in sources}
+
+    # Function to mark exactly the given sources active (needed by a visible tab)
+    def set_active(self, sources):
+        for source, state in self.sources.items():
+            state.active = source in sources
+
+    def active_sources(self):
+        return [source for source, state in self.sources.items() if state.active]
+
+    def busy(self):
+        return any(state.in_flight for state in self.sources.values())
+
+    # Function to list active (or, for an idle prefetch, inactive) sources that are due
+    # and not already being refreshed
+    def due_sources(self, now=None, active=True):
+        now = time.time() if now is None else now
+        return [source for source, state in self.sources.items()
+                if state.active == active and not state.in_flight and state.next_due <= now]
+
+    def started(self, source):
+        self.sources[source].in_flight = True
+
+    # Function to push back a source's next refresh, e.g. when another refresh already brought its data
+    def postpone(self, source, next_due):
+        state = self.sources[source]
+        if not state.in_flight:
+            state.next_due = max(state.next_due, next_due)
+
+    def succeeded(self, source, next_due):
+        state = self.sources[source]
+        state.in_flight = False
+        state.failures = 0
+        state.next_due = next_due
+
+    def failed(self, source, now=None):
+        now = time.time() if now is None else now
+        state = self.sources[source]
+        state.in_flight = False
+        state.failures += 1
+        state.next_due = now + min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (state.failures - 1))
+
+    # Function to return the earliest time any idle active source is due, or None
+    def next_wakeup(self):
+        pending = [state.next_due for state in self.sources.values() if state.active and not state.in_flight]
+        return min(pending) if pending else None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Multi-location monitoring helpers for smwPyWx.
+# Sites are listed in the [Locations] section of wxconfig.ini as "name = zip".
+# Sites whose coordinates fall in the same coarse lat/lon grid cell share one OneCall
+# request, so a cluster of nearby repeaters costs a single API call per refresh.
+
+DEFAULT_GRID_DEGREES = 0.1   # about 11 km of latitude
+DEFAULT_MAX_WORKERS = 4      # concurrent site fetches
+
+# A site row only shows current conditions and the alert count
+ONECALL_EXCLUDE = "minutely,hourly,daily"
+
+
+# One monitored site; location and error are filled in once its ZIP is resolved
+class Site:
+    __slots__ = ('name', 'zip_code', 'location', 'error')
+
+    def __init__(self, name, zip_code):
+        self.name = name
+        self.zip_code = zip_code
+        self.location = None
+        self.error = None
+
+
+# Function to read the sites from a [Locations] config section, keeping file order
+def parse_locations(section):
+    return [Site(name, value.strip()) for name, value in section.items() if value.strip()]
+
+
+# Function to snap coordinates to the centre of their grid cell
+def grid_cell(lat, lon, size=DEFAULT_GRID_DEGREES):
+    return (round(round(lat / size) * size, 4), round(round(lon / size) * size, 4))
+
+
+# Function to resolve every site's ZIP with resolve(zip_code) into new Site objects.
+# Errors are kept per site so one bad ZIP doesn't stop the others.
+def resolve_sites(sites, resolve):
+    resolved = []
+    for site in sites:
+        site = Site(site.name, site.zip_code)
+        try:
+            site.location = resolve(site.zip_code)
+        except Exception as e:
+            site.error = str(e) or "Failed to resolve location."
+        resolved.append(site)
+    return resolved
+
+
+# Function to group resolved sites by grid cell: {(lat, lon): [row indexes]}
+def group_by_cell(sites, size=DEFAULT_GRID_DEGREES):
+    cells = {}
+    for row, site in enumerate(sites):
+        if site.location is not None:
+            cell = grid_cell(site.location['lat'], site.location['lon'], size)
+            cells.setdefault(cell, []).append(row)
+    return cells
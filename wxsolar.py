@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+# HamQSL solar data model and parser for smwPyWx.
+# parse() walks the solarxml.php document once with iterparse and returns a SolarData
+# with typed values: numbers as int/float, the publication time as a UNIX timestamp,
+# and None for anything missing or unparseable ("No Report", "NoRpt", empty tags).
+
+import calendar
+import io
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, fields
+
+
+class SolarParseError(ValueError):
+    pass
+
+
+# One calculated HF band condition, e.g. ("80m-40m", "day", "Good")
+@dataclass
+class BandCondition:
+    __slots__ = ('name', 'time', 'condition')
+    name: str
+    time: str
+    condition: str
+
+
+# One calculated VHF phenomenon, e.g. ("E-Skip", "europe", "Band Closed")
+@dataclass
+class VhfCondition:
+    __slots__ = ('name', 'location', 'condition')
+    name: str
+    location: str
+    condition: str
+
+
+@dataclass
+class SolarData:
+    __slots__ = ('source', 'updated', 'updated_text', 'solarflux', 'aindex', 'kindex', 'kindexnt',
+                 'xray', 'sunspots', 'heliumline', 'protonflux', 'electonflux', 'aurora',
+                 'normalization', 'latdegree', 'solarwind', 'magneticfield', 'geomagfield',
+                 'signalnoise', 'fof2', 'muffactor', 'muf', 'bands', 'vhf')
+    source: str
+    updated: int            # UNIX time of the HamQSL update, or None
+    updated_text: str       # as published, e.g. "17 Oct 2026 1200 GMT"
+    solarflux: int          # 10.7 cm solar flux (SFU)
+    aindex: int
+    kindex: int
+    kindexnt: str           # K index noon text, often "No Report"
+    xray: str               # X-ray class, e.g. "B5.3"
+    sunspots: int
+    heliumline: float
+    protonflux: float
+    electonflux: float      # (sic) HamQSL's spelling
+    aurora: int
+    normalization: float
+    latdegree: float        # aurora latitude
+    solarwind: float        # km/s
+    magneticfield: float    # Bz, nT
+    geomagfield: str        # e.g. "QUIET"
+    signalnoise: str        # e.g. "S0-S1"
+    fof2: float             # MHz
+    muffactor: float
+    muf: float              # MHz
+    bands: list             # [BandCondition]
+    vhf: list               # [VhfCondition]
+
+    # Function to list the band conditions for "day" or "night"
+    def bands_for(self, time_of_day):
+        return [band for band in self.bands if band.time == time_of_day]
+
+
+# Scalar fields and their types, in document order
+INT_FIELDS = ('solarflux', 'aindex', 'kindex', 'sunspots', 'aurora')
+FLOAT_FIELDS = ('heliumline', 'protonflux', 'electonflux', 'normalization', 'latdegree',
+                'solarwind', 'magneticfield', 'fof2', 'muffactor', 'muf')
+TEXT_FIELDS = ('source', 'kindexnt', 'xray', 'geomagfield', 'signalnoise')
+NUMERIC_FIELDS = INT_FIELDS + FLOAT_FIELDS
+SCALAR_FIELDS = ('updated',) + NUMERIC_FIELDS + TEXT_FIELDS
+
+
+def to_int(text):
+    value = to_float(text)
+    return int(value) if value is not None else None
+
+
+def to_float(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_text(text):
+    text = text.strip() if text else ""
+    return text or None
+
+
+# Function to parse HamQSL's "<updated>" text (e.g. " 17 Oct 2026 1200 GMT") into a UNIX time
+def parse_updated(text):
+    if not text:
+        return None
+    try:
+        return calendar.timegm(time.strptime(text.strip(), "%d %b %Y %H%M GMT"))
+    except ValueError:
+        return None
+
+
+CONVERTERS = {**{f: to_int for f in INT_FIELDS}, **{f: to_float for f in FLOAT_FIELDS},
+              **{f: to_text for f in TEXT_FIELDS}}
+
+
+# Function to parse solarxml.php bytes into a SolarData in one pass
+def parse(data):
+    values = dict.fromkeys(f.name for f in fields(SolarData))
+    bands, vhf = [], []
+    found = False
+    try:
+        for _, element in ET.iterparse(io.BytesIO(data), events=('end',)):
+            tag = element.tag
+            if tag == 'band':
+                bands.append(BandCondition(element.get('name'), element.get('time'), to_text(element.text)))
+            elif tag == 'phenomenon':
+                vhf.append(VhfCondition(element.get('name'), element.get('location'), to_text(element.text)))
+            elif tag == 'updated':
+                values['updated_text'] = to_text(element.text)
+                values['updated'] = parse_updated(element.text)
+            elif tag in CONVERTERS:
+                values[tag] = CONVERTERS[tag](element.text)
+            elif tag == 'solardata':
+                found = True
+            else:
+                continue
+            element.clear()
+    except ET.ParseError as e:
+        raise SolarParseError(str(e))
+    if not found:
+        raise SolarParseError("no 'solardata' element")
+    values['bands'] = bands
+    values['vhf'] = vhf
+    return SolarData(**values)
+
+
+# Function to flatten a SolarData into plain values; band conditions become e.g. day_80m-40m
+def to_record(solar):
+    record = {'updated': solar.updated_text}
+    record.update((name, getattr(solar, name)) for name in NUMERIC_FIELDS + TEXT_FIELDS)
+    for band in solar.bands:
+        record[f"{band.time}_{band.name}"] = band.condition
+    for phenomenon in solar.vhf:
+        record[f"vhf_{phenomenon.name}_{phenomenon.location}"] = phenomenon.condition
+    return record
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+# Hourly (48 h) and minutely (60 min) forecasts from OneCall for the Hourly and
+# Next Hour tabs. Only the fields those tables show are kept, one flat typed array per
+# field, instead of OneCall's list of nested dicts. Values stay metric; a cell is
+# converted and formatted from its row index only when the table draws it.
+# compact() stores the same columns as plain lists in place of the nested blocks, so
+# the cached payload (kept in memory and written to disk) stays small too.
+
+import sys
+import time
+from array import array
+
+import wxunits
+
+HOURLY_COLUMNS = ("Time", "Weather", "Temp", "Feels Like", "Precip", "Wind")
+MINUTELY_COLUMNS = ("Time", "Precipitation")
+
+# Precipitation (mm/h) drawn as a full-width bar on the Next Hour tab; heavier rain is clipped
+HEAVY_PRECIPITATION = 10.0
+
+
+# Function to return the OneCall exclude list for the enabled views
+def onecall_exclude(hourly, minutely):
+    return ",".join(block for block, wanted in (("minutely", minutely), ("hourly", hourly)) if not wanted)
+
+
+class HourlySeries:
+    __slots__ = ('dt', 'temp', 'feels_like', 'pop', 'precipitation', 'wind_speed', 'wind_deg', 'icon', 'description')
+
+    def __init__(self):
+        self.dt = array('q')
+        self.temp = array('d')           # °C
+        self.feels_like = array('d')     # °C
+        self.pop = array('d')            # probability of precipitation, 0-1
+        self.precipitation = array('d')  # rain + snow in the hour, mm
+        self.wind_speed = array('d')     # m/s
+        self.wind_deg = array('h')
+        self.icon = []                   # icon codes, interned so repeats share one string
+        self.description = []
+
+    def __len__(self):
+        return len(self.dt)
+
+
+class MinutelySeries:
+    __slots__ = ('dt', 'precipitation')
+
+    def __init__(self):
+        self.dt = array('q')
+        self.precipitation = array('d')  # mm/h
+
+    def __len__(self):
+        return len(self.dt)
+
+
+# Function to fill a series from compact() columns
+def _from_columns(series, columns):
+    for name in series.__slots__:
+        values = columns.get(name, ())
+        column = getattr(series, name)
+        if isinstance(column, array):
+            column.extend(values)
+        else:
+            column.extend(sys.intern(value) for value in values)
+    return series
+
+
+def to_columns(series):
+    return {name: list(getattr(series, name)) for name in series.__slots__}
+
+
+# Function to extract the hourly block of a OneCall payload, raw or compact(); empty if it wasn't fetched
+def parse_hourly(payload):
+    if 'hourly_columns' in payload:
+        return _from_columns(HourlySeries(), payload['hourly_columns'])
+    series = HourlySeries()
+    for hour in payload.get('hourly', ()):
+        weather = hour['weather'][0] if hour.get('weather') else {}
+        series.dt.append(int(hour['dt']))
+        series.temp.append(float(hour.get('temp', 0)))
+        series.feels_like.append(float(hour.get('feels_like', 0)))
+        series.pop.append(float(hour.get('pop', 0)))
+        series.precipitation.append(float((hour.get('rain') or {}).get('1h', 0)) +
+                                    float((hour.get('snow') or {}).get('1h', 0)))
+        series.wind_speed.append(float(hour.get('wind_speed', 0)))
+        series.wind_deg.append(int(hour.get('wind_deg', 0)))
+        series.icon.append(sys.intern(weather.get('icon', '')))
+        series.description.append(sys.intern(weather.get('description', '')))
+    return series
+
+
+def parse_minutely(payload):
+    if 'minutely_columns' in payload:
+        return _from_columns(MinutelySeries(), payload['minutely_columns'])
+    series = MinutelySeries()
+    for minute in payload.get('minutely', ()):
+        series.dt.append(int(minute['dt']))
+        series.precipitation.append(float(minute.get('precipitation', 0)))
+    return series
+
+
+TIMELINE_KEYS = ('hourly', 'minutely', 'hourly_columns', 'minutely_columns')
+
+
+# Function to return the payload without the hourly and minutely data, once they are parsed
+def without_timeline(payload):
+    return {key: value for key, value in payload.items() if key not in TIMELINE_KEYS}
+
+
+# Function to replace a raw payload's hourly and minutely blocks with compact columns
+def compact(payload):
+    if 'hourly' not in payload and 'minutely' not in payload:
+        return payload
+    compacted = without_timeline(payload)
+    if 'hourly' in payload:
+        compacted['hourly_columns'] = to_columns(parse_hourly(payload))
+    if 'minutely' in payload:
+        compacted['minutely_columns'] = to_columns(parse_minutely(payload))
+    return compacted
+
+
+# Function to tell whether two series hold the same values
+def same_series(a, b):
+    return type(a) is type(b) and all(getattr(a, name) == getattr(b, name) for name in a.__slots__)
+
+
+# Function to format one Hourly table cell in display units
+def hourly_text(series, row, column, units):
+    unit_labels = wxunits.UNIT_LABELS[units]
+    imperial = units == "imperial"
+    if column == 0:
+        return time.strftime('%a %I %p', time.localtime(series.dt[row]))
+    if column == 1:
+        return series.description[row].capitalize()
+    if column in (2, 3):
+        value = series.temp[row] if column == 2 else series.feels_like[row]
+        return f"{wxunits.c_to_f(value) if imperial else value}{unit_labels['temp']}"
+    if column == 4:
+        text = f"{int(series.pop[row] * 100)}%"
+        amount = series.precipitation[row]
+        return f"{text} ({amount:.1f} mm)" if amount else text
+    speed = wxunits.ms_to_mph(series.wind_speed[row]) if imperial else series.wind_speed[row]
+    return f"{speed} {unit_labels['speed']} @ {series.wind_deg[row]}°"
+
+
+# Function to format one Next Hour table cell; OneCall reports minutely precipitation in mm/h
+def minutely_text(series, row, column):
+    if column == 0:
+        return time.strftime('%H:%M', time.localtime(series.dt[row]))
+    return f"{series.precipitation[row]:.2f} mm/h"
+
+
+# Function to return how much of the bar a minute's precipitation fills (0-1)
+def precipitation_fraction(series, row):
+    return min(1.0, series.precipitation[row] / HEAVY_PRECIPITATION)
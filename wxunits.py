@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+# Unit conversion for OneCall payloads.
+# The app always fetches in metric (the canonical units) and converts locally for
+# display, so switching between Celsius and Fahrenheit re-renders without any
+# network call. Conversion returns new dicts; the raw payload is left untouched.
+
+CANONICAL_UNITS = "metric"
+
+# Display suffixes per unit system
+UNIT_LABELS = {
+    "metric": {'temp': "°C", 'speed': "m/s", 'distance': "km"},
+    "imperial": {'temp': "°F", 'speed': "mph", 'distance': "mi"},
+}
+
+# Fields converted in the current block and in each daily entry
+TEMP_FIELDS = ('temp', 'feels_like', 'dew_point')
+SPEED_FIELDS = ('wind_speed', 'wind_gust')
+
+MS_TO_MPH = 2.2369362920544
+M_TO_KM = 0.001
+M_TO_MI = 0.000621371192237
+
+
+def c_to_f(value):
+    return round(value * 9 / 5 + 32, 2)
+
+
+def ms_to_mph(value):
+    return round(value * MS_TO_MPH, 2)
+
+
+# Function to convert a temperature that may be a number or a dict of numbers (daily temp/feels_like)
+def _convert_temp(value, fn):
+    if isinstance(value, dict):
+        return {k: fn(v) if isinstance(v, (int, float)) else v for k, v in value.items()}
+    if isinstance(value, (int, float)):
+        return fn(value)
+    return value
+
+
+# Function to convert one current/daily block from metric to the given units
+def convert_block(block, units):
+    converted = dict(block)
+    imperial = units == "imperial"
+    if imperial:
+        for field in TEMP_FIELDS:
+            if field in converted:
+                converted[field] = _convert_temp(converted[field], c_to_f)
+        for field in SPEED_FIELDS:
+            if isinstance(converted.get(field), (int, float)):
+                converted[field] = ms_to_mph(converted[field])
+    # OneCall reports visibility in metres regardless of units; show km or miles
+    if isinstance(converted.get('visibility'), (int, float)):
+        factor = M_TO_MI if imperial else M_TO_KM
+        converted['visibility'] = round(converted['visibility'] * factor, 1)
+    return converted
+
+
+# Function to convert a whole metric OneCall payload to display units in one pass
+def convert_onecall(payload, units):
+    converted = dict(payload)
+    if 'current' in payload:
+        converted['current'] = convert_block(payload['current'], units)
+    if 'daily' in payload:
+        converted['daily'] = [convert_block(day, units) for day in payload['daily']]
+    return converted
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+# View-models for the smwPyWx window.
+# Each tab is described as a flat dict of widget key -> rendered text, built from the
+# display data without touching Qt. ViewState remembers what was last pushed to the
+# widgets, so a refresh only updates the labels whose text actually changed and an
+# unchanged refresh makes no widget calls at all.
+
+import time
+
+import wxunits
+
+# Styled band-condition fragments, built once instead of on every refresh
+CONDITION_COLORS = {"Excellent": "blue", "Good": "green", "Poor": "red"}
+CONDITION_HTML = {condition: f'<span style="color: {color};">{condition}<br></span>'
+                  for condition, color in CONDITION_COLORS.items()}
+
+_UNSET = object()
+
+
+# Function to format an optional solar value, showing "N/A" when HamQSL had no report
+def show_value(value, suffix=""):
+    return "N/A" if value is None else f"{value}{suffix}"
+
+
+# Function to return color-coded band conditions; unknown conditions are returned unstyled
+def colored_condition(condition):
+    return CONDITION_HTML.get(condition, condition)
+
+
+def location_view(location):
+    state_display = f"{location['state_name']} ({location['state_code']})" if location['state_name'] else location['country']
+    return {'location': f"Weather Information for {location['city']}, {state_display}"}
+
+
+# Function to build the Current Weather tab from a OneCall current block in display units
+def current_view(current, units):
+    unit_labels = wxunits.UNIT_LABELS[units]
+    degree_unit = unit_labels['temp']
+    speed_unit = unit_labels['speed']
+    return {
+        'current.temp': f"Temperature: {current.get('temp', 0)}{degree_unit}",
+        'current.feels_like': f"Feels Like: {current.get('feels_like', 0)}{degree_unit}",
+        'current.humidity': f"Humidity: {current.get('humidity', 0)}%",
+        'current.dew_point': f"Dew Point: {current.get('dew_point', 0)}{degree_unit}",
+        'current.pressure': f"Pressure: {current.get('pressure', 0)} hPa",
+        'current.wind_speed': f"Wind Speed: {current.get('wind_speed', 0)} {speed_unit} @ {current.get('wind_deg', 0)}°",
+        'current.wind_gust': f"Wind Gusts: {current.get('wind_gust', 0)} {speed_unit}",
+        'current.description': f"Weather: {current['weather'][0]['description']}",
+        'current.clouds': f"Cloud Cover: {current.get('clouds', 0)}%",
+        'current.visibility': f"Visibility: {current.get('visibility', 0)} {unit_labels['distance']}",
+        'current.sunrise': f"Sunrise: {time.strftime('%I:%M %p', time.localtime(current.get('sunrise', 0)))}",
+        'current.sunset': f"Sunset: {time.strftime('%I:%M %p', time.localtime(current.get('sunset', 0)))}",
+    }
+
+
+# Function to build the 5-Day Forecast tab; keys are forecast.<column>.<field>
+def forecast_view(daily, units, days=5):
+    degree_unit = wxunits.UNIT_LABELS[units]['temp']
+    view = {}
+    for i, day_data in enumerate(daily[:days]):
+        temp = day_data['temp']
+        view[f'forecast.{i}.day'] = time.strftime('%A', time.localtime(day_data['dt']))
+        view[f'forecast.{i}.temp'] = (f'<font color="red">{temp["max"]}{degree_unit}</font> / '
+                                      f'<font color="blue">{temp["min"]}{degree_unit}</font>')
+        view[f'forecast.{i}.precip'] = f"{day_data['weather'][0]['description'].title()} - {int(day_data['pop'] * 100)}%"
+    return view
+
+
+# Function to build the Next Hour tab summary from a wxtimeline.MinutelySeries
+def minutely_view(minutely):
+    if not len(minutely):
+        return {'minutely.summary': "No minute-by-minute forecast for this location."}
+    wet = [row for row in range(len(minutely)) if minutely.precipitation[row] > 0]
+    if not wet:
+        return {'minutely.summary': "No precipitation expected in the next hour."}
+    start = time.strftime('%H:%M', time.localtime(minutely.dt[wet[0]]))
+    peak = max(minutely.precipitation[row] for row in wet)
+    return {'minutely.summary': f"Precipitation from {start}, up to {peak:.2f} mm/h."}
+
+
+# Function to build the Solar Weather tab (and the Sites tab summary) from a wxsolar.SolarData
+def solar_view(solar):
+    band_conditions_day = "\n".join(f"{band.name}: {colored_condition(band.condition)}"
+                                    for band in solar.bands_for('day'))
+    band_conditions_night = "\n".join(f"{band.name}: {colored_condition(band.condition)}"
+                                      for band in solar.bands_for('night'))
+    vhf_conditions = "<br>".join(f"{p.name} ({p.location}): {p.condition}" for p in solar.vhf)
+
+    column1_text = (f"A Index: ............{show_value(solar.aindex)}\n"
+                    f"K Index: ............{show_value(solar.kindex)}\n"
+                    f"Solar Flux: .........{show_value(solar.solarflux)}\n"
+                    f"Sunspots: ...........{show_value(solar.sunspots)}\n"
+                    f"X-Ray: ..............{show_value(solar.xray)}\n"
+                    f"Solar Wind: .........{show_value(solar.solarwind, ' km/s')}\n"
+                    f"Bz: .................{show_value(solar.magneticfield, ' nT')}\n"
+                    f"Proton Flux: ........{show_value(solar.protonflux)}\n"
+                    f"Electron Flux: ......{show_value(solar.electonflux)}\n"
+                    f"Aurora: .............{show_value(solar.aurora)}\n"
+                    f"MUF: ................{show_value(solar.muf, ' MHz')}\n"
+                    f"Signal to Noise: ....{show_value(solar.signalnoise)}\n"
+                    f"Geomagnetic Field: ..{show_value(solar.geomagfield)}\n"
+                    f"Updated: ............{show_value(solar.updated_text)}")
+
+    column2_text = (f"Band Conditions (Day):<br>{band_conditions_day}<br><br>"
+                    f"Band Conditions (Night):<br>{band_conditions_night}")
+    if vhf_conditions:
+        column2_text += f"<br><br>VHF Conditions:<br>{vhf_conditions}"
+
+    return {
+        'solar.column1': column1_text,
+        'solar.column2': column2_text,
+        'sites.solar': (f"Solar Flux: {show_value(solar.solarflux)}   K Index: {show_value(solar.kindex)}   "
+                        f"A Index: {show_value(solar.aindex)}   Geomagnetic Field: {show_value(solar.geomagfield)}"),
+    }
+
+
+# Last values pushed to the widgets, keyed like the view dicts above
+class ViewState:
+    def __init__(self):
+        self._rendered = {}
+
+    # Function to return the entries of view that differ from what is on screen, and record them as rendered
+    def changes(self, view):
+        rendered = self._rendered
+        changed = {key: value for key, value in view.items() if rendered.get(key, _UNSET) != value}
+        rendered.update(changed)
+        return changed
+
+    def rendered(self, key):
+        return self._rendered.get(key)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+# Local ZIP code index for smwPyWx.
+# The pgeocode US postal table is converted once into a small binary file that is
+# memory-mapped and looked up in O(1) by ZIP number, so resolving a location needs
+# no network call and no pandas DataFrame. ZIPs missing from the index are geocoded
+# through the OpenWeather geo API by the caller and remembered in a JSON cache.
+
+import mmap
+import os
+import struct
+import threading
+
+from wxcache import read_json, write_json
+
+# File layout: header, then one fixed-size slot per ZIP 00000-99999, then a string table.
+# Slot: latitude, longitude (float32), string offset (uint32), string length (uint16).
+# A length of 0 marks a ZIP that is not in the dataset.
+MAGIC = b'SMWZIP1\0'
+SLOT = struct.Struct('<ffIH')
+ZIP_COUNT = 100000
+TABLE_OFFSET = len(MAGIC)
+STRINGS_OFFSET = TABLE_OFFSET + SLOT.size * ZIP_COUNT
+
+
+# Function to turn the pgeocode dataset into an index file at path
+def build_zip_index(path):
+    import pgeocode  # Heavy (pulls in pandas); only needed to build the index once
+
+    # Nominatim downloads and caches the GeoNames table; one vectorized query covers every ZIP.
+    # Like a single lookup, a ZIP shared by several places gets their names comma-joined.
+    data = pgeocode.Nominatim('US').query_postal_code([f"{number:05d}" for number in range(ZIP_COUNT)])
+
+    slots = bytearray(SLOT.size * ZIP_COUNT)
+    strings = bytearray()
+    for row in data.itertuples(index=False):
+        postal_code = str(row.postal_code)
+        if len(postal_code) != 5 or not postal_code.isdigit():
+            continue
+        if row.latitude != row.latitude or row.longitude != row.longitude:  # NaN
+            continue
+        fields = [row.place_name, row.state_code, row.state_name]
+        text = "\t".join("" if f != f else str(f) for f in fields).encode('utf-8')
+        SLOT.pack_into(slots, SLOT.size * int(postal_code),
+                       row.latitude, row.longitude, len(strings), len(text))
+        strings += text
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(slots)
+        f.write(strings)
+    os.replace(tmp_path, path)
+
+
+# Memory-mapped, read-only view of the index file; built on first use if missing
+class ZipIndex:
+    def __init__(self, path):
+        self.path = path
+        self._map = None
+        self._build_error = None  # a failed build isn't retried; lookups fail at once
+        self._lock = threading.Lock()
+
+    def _open(self):
+        with self._lock:
+            if self._map is not None:
+                return self._map
+            if self._build_error is not None:
+                raise self._build_error
+            if not os.path.exists(self.path):
+                try:
+                    build_zip_index(self.path)
+                except Exception as e:
+                    self._build_error = e
+                    raise
+            with open(self.path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if mapped[:len(MAGIC)] != MAGIC:
+                mapped.close()
+                raise ValueError(f"{self.path} is not a ZIP index")
+            self._map = mapped
+            return mapped
+
+    # Function to return the location for a 5-digit ZIP, or None if it is unknown
+    def lookup(self, zip_code):
+        zip_code = zip_code.strip()
+        if len(zip_code) != 5 or not zip_code.isdigit():
+            return None
+        mapped = self._open()
+        lat, lon, offset, length = SLOT.unpack_from(mapped, TABLE_OFFSET + SLOT.size * int(zip_code))
+        if length == 0:
+            return None
+        start = STRINGS_OFFSET + offset
+        city, state_code, state_name = mapped[start:start + length].decode('utf-8').split("\t")
+        return {
+            'city': city,
+            'lat': round(lat, 4),
+            'lon': round(lon, 4),
+            'country': 'US',
+            'state_code': state_code,
+            'state_name': state_name,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+# Persistent ZIP -> location cache for lookups that had to go to the geo API
+class GeocodeCache:
+    def __init__(self, path):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = read_json(self.path, {})
+        return self._entries
+
+    def get(self, zip_code):
+        with self._lock:
+            return self._load().get(zip_code)
+
+    def put(self, zip_code, location):
+        with self._lock:
+            entries = self._load()
+            entries[zip_code] = location
+            write_json(self.path, entries)